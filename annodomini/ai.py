@@ -0,0 +1,109 @@
+import bisect
+import math
+import random
+
+SKILLS = {
+    "easy": 200.0,
+    "normal": 50.0,
+    "hard": 10.0,
+}
+
+
+class AnnoDominiAI:
+    """
+    Decision making for computer players.
+
+    The AI "knows" each card's date up to some noise: the first time it
+    sees a card it takes the card's midpoint and adds a normally
+    distributed error. Cards are played where a binary search over the
+    believed dates of the board puts them, and the previous player is
+    challenged when the estimated chance of their card being out of
+    order is high enough. Decisions are a handful of dict lookups and a
+    bisect, so they take microseconds.
+
+    Parameters
+    ----------
+    noise : `float`
+        Standard deviation (in years) of the AI's error on a card's date.
+    caution : `float`
+        Estimated probability of an error above which the AI challenges.
+    rng : `random.Random`, optional
+        Source of randomness for the knowledge model.
+    """
+    def __init__(self, noise: float = SKILLS["normal"], caution: float = 0.5,
+                 rng: random.Random = None):
+        self.noise = noise * 365.25
+        self.caution = caution
+        self.rng = rng or random.Random()
+        self._beliefs = {}
+
+    def belief(self, card) -> float:
+        """
+        Returns the date (as a day ordinal) the AI believes a card has.
+        """
+        try:
+            return self._beliefs[card]
+        except KeyError:
+            date = (card.start + card.end) / 2 + self.rng.gauss(0, self.noise)
+            self._beliefs[card] = date
+            return date
+
+    def choose_move(self, engine) -> tuple:
+        """
+        Returns the move for the engine's current player.
+        """
+        if engine.validate_move(("challenge",)) \
+                and self.inversion_probability(engine) > self.caution:
+            return ("challenge",)
+        return self.choose_play(engine)
+
+    def choose_play(self, engine) -> tuple:
+        """
+        Returns the play the AI is most confident about.
+
+        Each card in hand is placed by bisecting the believed dates of
+        the board, and the card with the widest gap to its neighbours
+        is played.
+        """
+        beliefs = [self.belief(card) for card in engine.board]
+        hand = engine.players[engine.turn_order].cards
+        best = None
+        for idx, card in enumerate(hand, 1):
+            date = self.belief(card)
+            position = bisect.bisect_right(beliefs, date)
+            margin = min(
+                date - beliefs[position-1] if position > 0 else math.inf,
+                beliefs[position] - date if position < len(beliefs) else math.inf
+            )
+            if best is None or margin > best[0]:
+                best = (margin, idx, position)
+        return ("play", best[1], best[2])
+
+    def inversion_probability(self, engine) -> float:
+        """
+        Estimated chance the last card played is out of order.
+
+        Each pair's believed gap is compared with the spread of the
+        AI's errors on two dates, giving the probability that the pair
+        is actually the wrong way round.
+        """
+        position = engine.last_position
+        if position is None:
+            return 0.0
+        board = engine.board
+        card = self.belief(board[position])
+        ordered = 1.0
+        if position > 0:
+            ordered *= 1 - self._swapped(self.belief(board[position-1]), card)
+        if position < len(board) - 1:
+            ordered *= 1 - self._swapped(card, self.belief(board[position+1]))
+        return 1 - ordered
+
+    def _swapped(self, earlier: float, later: float) -> float:
+        """
+        Probability that two believed dates are really the other way round.
+        """
+        spread = self.noise * math.sqrt(2)
+        if not spread:
+            return float(later < earlier)
+        return 0.5 * math.erfc((later - earlier) / (spread * math.sqrt(2)))
@@ -1,28 +1,41 @@
 import asyncio
-import csv
+import logging
 import random
-import re
 import time
 
-from pathlib import Path
 from typing import Literal, Optional
 
 import discord
 
 from redbot.core import (
+    checks,
     Config,
     commands,
     data_manager
 )
+from redbot.core.utils.chat_formatting import box, humanize_list, pagify
 
+from .ai import AnnoDominiAI, SKILLS
 from .annodominigame import (
+    AnnoDominiBotPlayer,
     AnnoDominiGame,
     AnnoDominiPlayer,
-    AnnoDominiCard,
+    AnnoDominiSettings,
     TooManyGamesException
 )
+from .cardstats import DIFFICULTIES, AnnoDominiCardStats
+from .deck import AnnoDominiDeckStore
+from .leaderboard import AnnoDominiLeaderboard
+from .movelog import EVENT_LEAVE, AnnoDominiMoveLog
+from .registry import AnnoDominiRegistry
+from .render import AnnoDominiRenderer
+from .snapshot import AnnoDominiSnapshotStore
+from .router import AnnoDominiTurnRouter
+from .timerwheel import TimerWheel
+from .tournament import AnnoDominiTableScheduler, AnnoDominiTournament
 
 UNIQUE_ID = 165778314672494
+MAX_BOTS = 8
 
 
 class AnnoDomini(commands.Cog):
@@ -34,7 +47,24 @@ class AnnoDomini(commands.Cog):
         super().__init__()
         self.bot = bot
         self.name = "annodomini"
-        self.games = []
+        self.games = AnnoDominiRegistry()
+        self.router = AnnoDominiTurnRouter()
+        self.renderer = AnnoDominiRenderer()
+        self.timers = TimerWheel()
+        self.tables = AnnoDominiTableScheduler()
+        self.tournaments = {}
+        self.snapshots = AnnoDominiSnapshotStore(
+            data_manager.cog_data_path(self) / "snapshots")
+        self.movelog = AnnoDominiMoveLog(
+            data_manager.cog_data_path(self) / "movelog")
+        self.cardstats = AnnoDominiCardStats(
+            data_manager.cog_data_path(self) / "cardstats")
+        self.unloading = False
+        self.log = logging.getLogger('red.redarmycogs.annodomini')
+        self._resume_task = None
+        self.decks = AnnoDominiDeckStore(
+            data_manager.bundled_data_path(self),
+            data_manager.cog_data_path(self) / "decks")
         self.config = Config.get_conf(
             self,
             identifier=UNIQUE_ID,
@@ -45,12 +75,17 @@ class AnnoDomini(commands.Cog):
             language="de",
             startinghand=9,
             delay=300.0,
-            doMention=True
+            doMention=True,
+            hints=False,
+            difficulty="mixed",
+            threads=False,
+            maxtables=10
         )
 
         self.config.register_member(
             wins=0, games=0
         )
+        self.ranking = AnnoDominiLeaderboard(self.config)
 
     async def red_delete_data_for_user(self, *,
         requester: Literal["discord", "owner", "user", "user_strict"],
@@ -60,6 +95,7 @@ class AnnoDomini(commands.Cog):
         Delete user data.
         """
         await self.config.user_from_id(user_id).clear()
+        self.ranking.discard(user_id)
         return
 
     @commands.guild_only()
@@ -96,18 +132,32 @@ class AnnoDomini(commands.Cog):
                 "Creating new game..."
             )
             try:
-                newgame = AnnoDominiGame(self, ctx, topics)
-                self.games.append(newgame)
+                newgame = AnnoDominiGame(self, ctx.channel, topics)
             except TooManyGamesException:
                 return await ctx.channel.send(
                     "Too many games in progress!"
                 )
-            player = AnnoDominiPlayer(ctx, owner=True)
-            newgame.players.append(player)
+            if await self.config.guild(ctx.guild).threads() \
+                    and not isinstance(ctx.channel, discord.Thread):
+                try:
+                    newgame.channel = await ctx.message.create_thread(
+                        name=f"Anno Domini #{newgame.gid}",
+                        auto_archive_duration=60)
+                except discord.HTTPException:
+                    await ctx.channel.send(
+                        "I couldn’t open a thread, so the game will be "
+                        "played here.")
+            self.games.add(newgame)
+            player = AnnoDominiPlayer(ctx.author, owner=True)
+            self.games.add_player(newgame, player)
+            where = ""
+            if newgame.channel != ctx.channel:
+                where = f" in {newgame.channel.mention}"
             await ctx.channel.send(
-                f"You created game id: *{newgame.gid}*\n"
+                f"You created game id: *{newgame.gid}*{where}\n"
                 f"Other players can join with **{prefix[0]}{self.name} "
-                f"join**.\nOnce ready, type **{prefix[0]}{self.name} start**!"
+                f"join {newgame.gid}**.\nOnce ready, type "
+                f"**{prefix[0]}{self.name} start**!"
             )
         else:
             await ctx.channel.send(
@@ -145,26 +195,189 @@ class AnnoDomini(commands.Cog):
         """
         if language is not None:
             await self.config.guild(ctx.guild).language.set(language)
+            await self._update_settings(ctx.guild)
             return await ctx.send(f"Language has been changed to {language}.")
 
         language = await self.config.guild(ctx.guild).language()
         await ctx.send(f"Language is currently set to {language}.")
 
     @annodomini.command()
-    async def join(self, ctx):
+    @checks.guildowner()
+    async def hints(self, ctx: commands.Context, value: bool = None):
+        """
+        Set whether players may ask for hints.
+
+        Defaults to False.
+        This value is server specific.
+        """
+        if value is None:
+            value = await self.config.guild(ctx.guild).hints()
+        else:
+            await self.config.guild(ctx.guild).hints.set(value)
+            await self._update_settings(ctx.guild)
+        await ctx.send(
+            f"Hints are {'enabled' if value else 'disabled'}.")
+
+    @annodomini.command()
+    @checks.guildowner()
+    async def threads(self, ctx: commands.Context, value: bool = None):
+        """
+        Set whether each new game gets its own thread.
+
+        Games in threads are joined with their game id, so one channel
+        can hold many games at once.
+        Defaults to False.
+        This value is server specific.
+        """
+        if value is None:
+            value = await self.config.guild(ctx.guild).threads()
+        else:
+            await self.config.guild(ctx.guild).threads.set(value)
+        await ctx.send(
+            f"Games {'get their own thread' if value else 'are played in the channel'}.")
+
+    @annodomini.command()
+    @checks.guildowner()
+    async def difficulty(self, ctx: commands.Context, value: str = None):
+        """
+        Set which cards new games favour: mixed, easy or hard.
+
+        Difficulty is learnt from how often players misplace each card.
+        Defaults to mixed.
+        This value is server specific.
+        """
+        if value is None:
+            value = await self.config.guild(ctx.guild).difficulty()
+            return await ctx.send(f"Card difficulty is currently set to {value}.")
+        value = value.lower()
+        if value not in DIFFICULTIES:
+            return await ctx.send(
+                f"Difficulty must be {humanize_list(DIFFICULTIES, style='or')}.")
+        await self.config.guild(ctx.guild).difficulty.set(value)
+        await self._update_settings(ctx.guild)
+        await ctx.send(f"Card difficulty has been changed to {value}.")
+
+    @annodomini.group(invoke_without_command=True)
+    async def stats(self, ctx: commands.Context):
+        """
+        Statistics about Anno Domini.
+        """
+        await ctx.send_help()
+
+    @annodomini.command()
+    async def leaderboard(self, ctx: commands.Context, count: int = 10):
+        """
+        Show the players with the most wins on this server.
+        """
+        top = await self.ranking.top(ctx.guild, max(1, min(count, 50)))
+        if not top:
+            return await ctx.send("Nobody has finished a game yet.")
+        lines = []
+        for place, (member_id, wins, games) in enumerate(top, 1):
+            member = ctx.guild.get_member(member_id)
+            name = member.display_name if member else f"Unknown ({member_id})"
+            lines.append(f"{place:>2}. {name}: {wins} wins from {games} games")
+        for page in pagify("\n".join(lines)):
+            await ctx.send(box(page))
+
+    @stats.command(name="cards")
+    async def stats_cards(self, ctx: commands.Context, order: str = "hardest"):
+        """
+        Show the hardest (or easiest) cards for this server’s language.
+
+        Only cards played at least five times are listed.
+        """
+        hardest = order.lower() != "easiest"
+        language = await self.config.guild(ctx.guild).language()
+        deck = await self.decks.get(language)
+        counters = await self.cardstats.counters(deck)
+        ranked = counters.ranked(hardest)[:20]
+        if not ranked:
+            return await ctx.send("No card has been played often enough yet.")
+        lines = [
+            f"{counters.difficulty(idx):>4.0%} missed  "
+            f"{counters.played[idx]:>4} played  "
+            f"{counters.caught[idx]:>4} caught  {deck[idx].name} ({deck[idx].date})"
+            for idx in ranked
+        ]
+        for page in pagify("\n".join(lines)):
+            await ctx.send(box(page))
+
+    @stats.command(name="dms")
+    @checks.is_owner()
+    async def stats_dms(self, ctx: commands.Context):
+        """
+        Show how long sending players their hands has taken lately.
+        """
+        latencies = sorted(self.renderer.dm_latencies)
+        if not latencies:
+            return await ctx.send("No hands have been sent yet.")
+
+        def centile(share: float) -> str:
+            latency = latencies[min(len(latencies) - 1, int(share * len(latencies)))]
+            return f"{latency * 1000:.0f} ms"
+
+        lines = [
+            f"hands sent:   {len(latencies)}",
+            f"p50 latency:  {centile(0.5)}",
+            f"p90 latency:  {centile(0.9)}",
+            f"p99 latency:  {centile(0.99)}",
+            f"max latency:  {latencies[-1] * 1000:.0f} ms",
+        ]
+        await ctx.send(box("\n".join(lines)))
+
+    @annodomini.command()
+    async def hint(self, ctx: commands.Context, card: int):
+        """
+        Find out where a card in your hand could go on the board.
+
+        The answer is sent to you in a private message.
+        """
+        game = self._get_user_game(ctx.author)
+        if game is None or game.settings is None:
+            return await ctx.channel.send("You’re not playing a game!")
+        if not game.settings.hints:
+            return await ctx.channel.send("Hints are disabled on this server.")
+        player = next(p for p in game.players if p.member.id == ctx.author.id)
+        if not 1 <= card <= len(player.cards):
+            return await ctx.channel.send("You don’t have that card.")
+        positions = game.valid_positions(player.cards[card-1])
+        if not positions:
+            return await ctx.author.send(
+                f"There’s nowhere on the board card #{card} fits!")
+        await ctx.author.send(
+            f"Card #{card} fits after space "
+            f"{humanize_list([str(p) for p in positions], style='or')}.")
+
+    @annodomini.command()
+    async def join(self, ctx, gid: int = None):
         """
         Join an open game of Anno Domini.
+
+        Give the game id to join a particular game, otherwise you join
+        the oldest game waiting for players here.
         """
         already_in_game = self._get_user_game(ctx.author)
         if already_in_game:
             return await ctx.channel.send(
                 f"{ctx.author.name}, you’re already playing a game!")
-        game = self._get_running_game(ctx)
+        if gid is None:
+            game = self._get_running_game(ctx)
+        else:
+            game = self.games.get(gid)
+            if game is not None and game.guild != ctx.guild:
+                game = None
+        if game and game.live:
+            return await ctx.channel.send(
+                f"Game #{game.gid} has already started.")
         if game:
-            player = AnnoDominiPlayer(ctx)
-            game.players.append(player)
+            player = AnnoDominiPlayer(ctx.author)
+            self.games.add_player(game, player)
+            where = ""
+            if game.channel != ctx.channel:
+                where = f" in {game.channel.mention}"
             return await ctx.channel.send(
-                f"{ctx.author.name} has joined game #{game.gid}.")
+                f"{ctx.author.name} has joined game #{game.gid}{where}.")
         await ctx.channel.send(
             f"No game found to join. Why not start your own?")
 
@@ -173,47 +386,97 @@ class AnnoDomini(commands.Cog):
         """
         Leave your current game of Anno Domini.
         """
-        # TODO:
-        # check if in game and leave it
-        await ctx.channel.send("Command not yet implemented.")
+        game = self._get_user_game(ctx.author)
+        if game is None:
+            return await ctx.channel.send("You don’t seem to be in a game!")
+        player = next(p for p in game.players if p.member.id == ctx.author.id)
+        idx = game.players.index(player)
+        self.games.remove_player(game, player)
+        await ctx.channel.send(
+            f"{ctx.author.name} has left game #{game.gid}.")
+        humans = [p for p in game.players if not p.bot]
+        if not humans or (game.live and len(game.players) < 2):
+            if game._task:
+                game._task.cancel()
+            self.games.remove(game)
+            return await ctx.channel.send(
+                f"Not enough players left, game #{game.gid} is over.")
+        promoted = 255
+        if player.owner:
+            # only the flag moves, so the seats (and turn_order) stay put
+            humans[0].owner = True
+            promoted = game.players.index(humans[0])
+        if game.live:
+            if idx < game.turn_order:
+                game.turn_order -= 1
+            elif game.turn_order >= len(game.players):
+                game.turn_order = 0
+            if game.recorder:
+                game.recorder(EVENT_LEAVE, idx, promoted, game.turn_order)
+            # on their own turn, hand it straight to the next player
+            self.router.withdraw(game.channel, ctx.author)
 
     @annodomini.command()
     async def start(self, ctx):
         """
         Starts the game of Anno Domini with min. 2 players.
         """
-        game = self._get_running_game(ctx)
+        game = self._get_user_game(ctx.author) or self._get_running_game(ctx)
         if game is None:
             return await ctx.channel.send(
                 f"Set up a game first!")
-        if game.players[0].member != ctx.author:
+        if not self._is_owner(game, ctx.author):
             return await ctx.channel.send(
                 f"Only the game owner can start it.")
+        if game.live:
+            return await ctx.channel.send(
+                f"The game has already started.")
         if len(game.players) < 2:
             return await ctx.channel.send(
                 f"You can’t play a game against yourself!")
-        await ctx.channel.send(f"Starting game...")
+        self.games.close_lobby(game)
+        await game.channel.send(f"Starting game...")
         await game.setup()
 
     @annodomini.command()
-    async def addbot(self, *, ctx):
+    async def addbot(self, ctx, count: int = 1, skill: str = "normal"):
         """
         Adds one/more bots to your current game.
+
+        Bots can be `easy`, `normal` or `hard`.
         """
-        # TODO:
-        # check if in game, otherwise how to start a game
-        # check if owner, otherwise warn not owner
-        # check if game in progress, otherwise warn not possible
-        # add * bots to current game players
-        await ctx.channel.send("Command not yet implemented.")
+        game = await self._get_owned_lobby(ctx)
+        if game is None:
+            return
+        if skill not in SKILLS:
+            return await ctx.channel.send(
+                f"Bots can be {', '.join(SKILLS)}.")
+        remaining = MAX_BOTS - self._count_bots(game)
+        if remaining <= 0:
+            return await ctx.channel.send(
+                f"Game #{game.gid} already has {MAX_BOTS} bots, the most "
+                f"allowed.")
+        count = min(max(count, 1), remaining)
+        for _ in range(count):
+            name = f"Bot #{self._count_bots(game) + 1} ({skill})"
+            ai = AnnoDominiAI(noise=SKILLS[skill])
+            self.games.add_player(game, AnnoDominiBotPlayer(name, ai))
+        await ctx.channel.send(
+            f"Game #{game.gid} now has {self._count_bots(game)} bot(s).")
 
     @annodomini.command()
-    async def delbot(self, *, ctx):
+    async def delbot(self, ctx, count: int = 1):
         """
         Removes one/more bots from your current game.
         """
-        # TODO
-        await ctx.channel.send("Command not yet implemented.")
+        game = await self._get_owned_lobby(ctx)
+        if game is None:
+            return
+        bots = [player for player in game.players if player.bot]
+        for player in bots[-count:] if count > 0 else []:
+            self.games.remove_player(game, player)
+        await ctx.channel.send(
+            f"Game #{game.gid} now has {self._count_bots(game)} bot(s).")
 
     @annodomini.command()
     async def kickplayer(self, ctx, *, name=None):
@@ -225,6 +488,132 @@ class AnnoDomini(commands.Cog):
         # TODO
         await ctx.channel.send("Command not yet implemented.")
 
+    @annodomini.group(invoke_without_command=True)
+    async def tournament(self, ctx: commands.Context):
+        """
+        Run a tournament over many tables of Anno Domini.
+        """
+        await ctx.send_help()
+
+    @tournament.command(name="open")
+    async def tournament_open(self, ctx: commands.Context, *topics: str):
+        """
+        Open a tournament in this channel for players to sign up to.
+        """
+        prefix = await ctx.bot.get_valid_prefixes()
+        if ctx.channel.id in self.tournaments:
+            return await ctx.send("There’s already a tournament in this channel.")
+        avail_topics = await self._get_topics(ctx)
+        if not all(topic in avail_topics for topic in topics):
+            return await ctx.send(
+                f"Topics not recognised. Type **{prefix[0]}{self.name} "
+                f"topics** to display the available list.")
+        tournament = AnnoDominiTournament(self, ctx.channel, ctx.author, topics)
+        tournament.signup(ctx.author)
+        self.tournaments[ctx.channel.id] = tournament
+        await ctx.send(
+            f"{ctx.author.display_name} has opened a tournament!\n"
+            f"Sign up with **{prefix[0]}{self.name} tournament signup**. "
+            f"Once everyone is in, type **{prefix[0]}{self.name} tournament "
+            f"begin**.")
+
+    @tournament.command(name="signup")
+    async def tournament_signup(self, ctx: commands.Context):
+        """
+        Sign up to the tournament in this channel.
+        """
+        tournament = self.tournaments.get(ctx.channel.id)
+        if tournament is None or tournament.started:
+            return await ctx.send("There’s no tournament to sign up to here.")
+        if not tournament.signup(ctx.author):
+            return await ctx.send("You’ve already signed up!")
+        await ctx.send(
+            f"{ctx.author.display_name} has signed up "
+            f"({len(tournament.players)} players).")
+
+    @tournament.command(name="withdraw")
+    async def tournament_withdraw(self, ctx: commands.Context):
+        """
+        Withdraw from the tournament in this channel before it begins.
+        """
+        tournament = self.tournaments.get(ctx.channel.id)
+        if tournament is None or tournament.started:
+            return await ctx.send("There’s no tournament to withdraw from here.")
+        if not tournament.withdraw(ctx.author):
+            return await ctx.send("You haven’t signed up!")
+        await ctx.send(
+            f"{ctx.author.display_name} has withdrawn "
+            f"({len(tournament.players)} players).")
+
+    @tournament.command(name="begin")
+    async def tournament_begin(self, ctx: commands.Context, rounds: int = None):
+        """
+        Start the tournament you opened.
+
+        The number of rounds is worked out from the number of players
+        unless you give one.
+        """
+        tournament = self.tournaments.get(ctx.channel.id)
+        if tournament is None or tournament.started:
+            return await ctx.send("There’s no tournament to begin here.")
+        if tournament.owner != ctx.author:
+            return await ctx.send("Only the player who opened it can begin it.")
+        if len(tournament.players) < 2:
+            return await ctx.send("You need at least two players!")
+        if rounds is not None and rounds < 1:
+            return await ctx.send("There must be at least one round.")
+        tournament.start(rounds)
+        await ctx.send(
+            f"The tournament begins with {len(tournament.players)} players "
+            f"over {tournament.rounds} rounds!")
+
+    @tournament.command(name="standings")
+    async def tournament_standings(self, ctx: commands.Context):
+        """
+        Show the leaders of the tournament in this channel.
+        """
+        tournament = self.tournaments.get(ctx.channel.id)
+        if tournament is None or not tournament.started:
+            return await ctx.send("There’s no tournament running here.")
+        await tournament.show_standings()
+        running = self.tables.running(ctx.guild.id)
+        queued = self.tables.queued(ctx.guild.id)
+        await ctx.send(f"{running} tables playing, {queued} waiting.")
+
+    @tournament.command(name="cancel")
+    async def tournament_cancel(self, ctx: commands.Context):
+        """
+        Call off the tournament you opened.
+
+        Tables already being played carry on as normal games.
+        """
+        tournament = self.tournaments.get(ctx.channel.id)
+        if tournament is None:
+            return await ctx.send("There’s no tournament here.")
+        if tournament.owner != ctx.author and ctx.author != ctx.guild.owner:
+            return await ctx.send("Only the player who opened it can cancel it.")
+        tournament.cancel()
+        del self.tournaments[ctx.channel.id]
+        await ctx.send("The tournament has been cancelled.")
+
+    @tournament.command(name="tables")
+    @checks.guildowner()
+    async def tournament_tables(self, ctx: commands.Context, value: int = None):
+        """
+        Set how many tournament tables may be played at once.
+
+        Further tables wait until one finishes.
+        Defaults to 10.
+        This value is server specific.
+        """
+        if value is None:
+            value = await self.config.guild(ctx.guild).maxtables()
+        elif value < 1:
+            return await ctx.send("At least one table must be allowed.")
+        else:
+            await self.config.guild(ctx.guild).maxtables.set(value)
+        await ctx.send(f"Up to {value} tables are played at once.")
+
     @annodomini.command()
     async def howtoplay(self, ctx):
         """
@@ -319,52 +708,145 @@ class AnnoDomini(commands.Cog):
             mention_author=False
         )
 
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        """
+        Passes messages on to any game waiting for the author's move.
+        """
+        self.router.dispatch(message)
+
     async def _get_topics(self, ctx) -> list:
         """
         Returns a list of topics available for the cog language.
         """
         language = await self.config.guild(ctx.guild).language()
-        sourcefile = Path.joinpath(data_manager.bundled_data_path(self),
-                                   f"data-{language}.csv")
-        with open(sourcefile, "r", encoding="utf8") as source:  # TODO: detect encoding
-            reader = csv.DictReader(source, delimiter=",")
-            return {row["topic"] for row in reader}
+        deck = await self.decks.get(language)
+        return list(deck.topics)
 
     def _get_languages(self) -> list:
         """
         Returns a list of languages available for the cog.
         """
-        folder = data_manager.bundled_data_path(self)
-        return [
-            re.sub(r"data-(\w+)\.csv", r"\1", p.name)
-            for p in folder.iterdir()
-            if p.is_file() and p.name.endswith("csv")]
+        return self.decks.languages()
 
     def _get_running_game(self, ctx: commands.Context) -> \
         Optional[AnnoDominiGame]:
         """
-        Returns a game if one is running in this channel or None.
+        Returns the game waiting for players in this channel (or one of
+        its threads), else any game in this channel, or None.
         """
-        for game in self.games:
-            if game.ctx.channel == ctx.channel:
-                return game
-
-        return next(
-            (game for game in self.games if game.ctx.channel == ctx.channel and game.live is False), None
-        )
+        return self.games.open_game(ctx.channel) or self.games.by_channel(ctx.channel)
 
     def _get_user_game(self, user: discord.Member) -> Optional[AnnoDominiGame]:
         """
         Returns a game if player is playing in one or None.
         """
-        for game in self.games:
-            for player in game.players:
-                if player.member.id == user.id:
-                    return game
-        return None
+        return self.games.by_member(user)
+
+    async def _get_owned_lobby(self, ctx) -> Optional[AnnoDominiGame]:
+        """
+        Returns the game the author owns if it hasn’t started yet.
+
+        Otherwise tells the author why not and returns None.
+        """
+        game = self._get_user_game(ctx.author)
+        if game is None:
+            prefix = await ctx.bot.get_valid_prefixes()
+            await ctx.channel.send(
+                f"You’re not in a game. Type **{prefix[0]}{self.name} "
+                f"newgame** to create one.")
+            return None
+        if not self._is_owner(game, ctx.author):
+            await ctx.channel.send("Only the game owner can do that.")
+            return None
+        if game.live:
+            await ctx.channel.send("The game has already started.")
+            return None
+        return game
+
+    async def _update_settings(self, guild: discord.Guild):
+        """
+        Hands a server’s changed settings to the games running there.
+        """
+        games = [game for game in self.games
+                 if game.guild.id == guild.id and game.settings is not None]
+        if games:
+            settings = await AnnoDominiSettings.load(self.config, guild)
+            for game in games:
+                game.settings = settings
+
+    @staticmethod
+    def _is_owner(game: AnnoDominiGame, member) -> bool:
+        """
+        Returns whether a member owns a game.
+        """
+        return any(player.owner and player.member.id == member.id
+                   for player in game.players)
+
+    @staticmethod
+    def _count_bots(game: AnnoDominiGame) -> int:
+        """
+        Returns the number of bots in a game.
+        """
+        return sum(player.bot for player in game.players)
+
+    async def cog_load(self):
+        self._resume_task = asyncio.create_task(self._resume_games())
+
+    async def _resume_games(self):
+        """
+        Restores every game saved when the cog was last unloaded.
+        """
+        await self.bot.wait_until_red_ready()
+        snapshots = await self.snapshots.load_all()
+        self.games.reserve_ids(snapshot.gid for snapshot in snapshots)
+        games = await asyncio.gather(
+            *[self._restore_game(snapshot) for snapshot in snapshots],
+            return_exceptions=True
+        )
+        for snapshot, game in zip(snapshots, games):
+            if isinstance(game, AnnoDominiGame):
+                self.games.add(game)
+                game.resume()
+                continue
+            if isinstance(game, Exception):
+                self.log.error(
+                    f"Could not resume game #{snapshot.gid}.", exc_info=game)
+            self.games.release_id(snapshot.gid)
+            await self.snapshots.delete(snapshot.gid)
+
+    async def _restore_game(self, snapshot) -> Optional[AnnoDominiGame]:
+        """
+        Rebuilds a game from a snapshot, or returns None if that is no
+        longer possible.
+        """
+        guild = self.bot.get_guild(snapshot.guild_id)
+        if guild is None:
+            return None
+        channel = guild.get_channel_or_thread(snapshot.channel_id)
+        if channel is None:
+            try:
+                channel = await guild.fetch_channel(snapshot.channel_id)
+            except discord.HTTPException:
+                return None
+        deck = await self.decks.get(snapshot.language)
+        if deck.mtime != snapshot.mtime:
+            await channel.send(
+                f"The cards have changed, so game #{snapshot.gid} "
+                f"couldn’t be resumed.")
+            return None
+        return await AnnoDominiGame.restore(self, channel, snapshot, deck)
 
     def cog_unload(self):
-        return [game._task.cancel() for game in self.games]
+        self.unloading = True
+        self.timers.stop()
+        self.movelog.close()
+        self.cardstats.close()
+        if self._resume_task:
+            self._resume_task.cancel()
+        for tournament in self.tournaments.values():
+            tournament.cancel()
+        return [game._task.cancel() for game in self.games if game._task]
 
 
 def setup(bot):
@@ -1,24 +1,51 @@
 import asyncio
-import csv
 import logging
-import random
-import re
 import time
 import traceback
 
-from pathlib import Path
+from typing import NamedTuple
 
 import discord
 
 from redbot.core.utils.chat_formatting import pagify
-from redbot.core import (
-    data_manager
-)
+
+from .ai import AnnoDominiAI
+from .engine import AnnoDominiEngine
+from .movelog import EVENT_END
+
+MIN_DECK_SIZE = 100
+TURN_WARNING = 30
+
 
 class TooManyGamesException(Exception):
     """Error thrown when there are too many games in progress."""
     pass
 
+
+class AnnoDominiSettings(NamedTuple):
+    """
+    A game’s own copy of its server’s settings.
+
+    The game loop reads its settings from here rather than from Config,
+    so a turn never waits on the config driver. The copy is taken when
+    the game starts and swapped for a new one whenever the server’s
+    settings change.
+    """
+    language: str
+    startinghand: int
+    delay: float
+    doMention: bool
+    hints: bool
+    difficulty: str
+
+    @classmethod
+    async def load(cls, config, guild) -> "AnnoDominiSettings":
+        """
+        Read a server’s settings in one go.
+        """
+        values = await config.guild(guild).all()
+        return cls(*(values[field] for field in cls._fields))
+
 class AnnoDominiPlayer:
     """
     Simple class to embody players and their hands.
@@ -33,118 +60,69 @@ class AnnoDominiPlayer:
         Reference to the bot message containing the player’s hand
     owner : `Bool`
         Whether player created their current game
+    bot : `Bool`
+        Whether the player is controlled by the computer
     """
-    def __init__(self, ctx, owner=False):
-        self.member = ctx.author
+    bot = False
+
+    def __init__(self, member, owner=False):
+        self.member = member
         self.cards = []
         self.card_embed = None
         self.owner = owner
 
 
-class AnnoDominiCard:
+class AnnoDominiBotMember:
     """
-    Simple class to embody an Anno Domini card.
-
-    The card holds information displayed to the players and
-    then revealed when an order is challenged. The start and
-    end dates are used in comparisons to check the order is
-    legitimate.
+    Stands in for the Discord member of a computer player.
 
     Attributes
     ----------
-    cid : `str`
-        Card ID number
-    start : `tuple`
-        Tuple in form (YYYY, MM, DD)
-    end : `tuple`
-        Tuple in form (YYYY, MM, DD)
+    id : `None`
+        Computer players have no Discord id
     name : `str`
-        The teaser information on the obverse of a card
-    desc : `str`
-        The revealed information on the reverse of a card
-    topic : `str`
-        Category of event
+        The computer player’s name
     """
-    def __init__(self, cid: str, start: str, end: str,
-                 name: str, desc: str, topic: str):
-        self.cid = cid
-        self.start = start
-        self.end = (start, end)
-        self.name = name
-        self.desc = desc
-        self.topic = topic
+    id = None
 
-    def __lt__(self, x):
-        """
-        Date A is earlier than date B if it both started and
-        ended before date B.
-        """
-        if self.start <= x.start and self.end <= x.start:
-            return True
-        return False
-
-    def __le__(self, x):
-        """
-        Date A and date B are overlapping if:
-        * date A occurred entirely during date B
-        * date B occurred entirely during date A
-        * date A ended after date B started but before B ended
-        * date A started before date B ended and after A started
-        """
-        if ((self.start <= x.start and self.end >= x.end) or
-            (self.start >= x.start and self.end <= x.end) or
-            (self.start >= x.start and self.start <= x.end) or
-            (self.end >= x.start and self.end <= x.end)):
-            return True
-
-    @property
-    def start(self):
-        return self._start
-
-    @start.setter
-    def start(self, value):
-        self._start = self._parse_date(value)
+    def __init__(self, name: str):
+        self.name = name
+        self.display_name = name
+        self.mention = name
 
-    @property
-    def end(self):
-        return self._end
 
-    @end.setter
-    def end(self, value: tuple):
-        if value[1]:
-            self._end = self._parse_date(value[1])
-        else:
-            self._end = self._parse_date(value[0], end=True)
+class AnnoDominiBotPlayer(AnnoDominiPlayer):
+    """
+    A player controlled by the computer.
 
-    def _parse_date(self, date, end: bool = False) -> tuple:
-        """
-        Helper method to convert human input dates into simple tuples.
+    Attributes
+    ----------
+    ai : `AnnoDominiAI`
+        Decides the player’s moves.
+    """
+    bot = True
 
-        If no end date is provided, we build it based on the start date.
-        Unspecific dates are automatically extended to the correct range.
-        """
-        date = [int(x) for x in re.split("(?<!^)-|[/.]", date)]
-        if not end:
-            if len(date) == 1:
-                date.extend([1, 1])
-            if len(date) == 2:
-                date.extend([1])
-        else:
-            if len(date) == 1:
-                date.extend([12, 31])
-            if len(date) == 2:
-                date.extend([31])  # FIXME: not every month has 31 days
-        return date
+    def __init__(self, name: str, ai: AnnoDominiAI):
+        self.member = AnnoDominiBotMember(name)
+        self.cards = []
+        self.card_embed = None
+        self.owner = False
+        self.ai = ai
 
 
-class AnnoDominiGame:
+class AnnoDominiGame(AnnoDominiEngine):
     """
     Class to run a game of Anno Domini.
 
+    The rules themselves live in `AnnoDominiEngine`; this class adds
+    everything to do with Discord.
+
     Attributes
     ----------
-    ctx : `commands.Context`
-        Context object from which this session is run.
+    channel : `discord.TextChannel`
+        Channel the game is played in.
+    guild : `discord.Guild`
+        Server the game is played in.
     cog : `commands.Cog`
         A reference to the parent cog.
     gid : `int`
@@ -153,14 +131,8 @@ class AnnoDominiGame:
         When game was started (unused)
     players : `list` of `AnnoDominiPlayer`
         Players in the game.
-    turn_order : `int`
-        Index of the player whose turn it is.
-    cards : `list` of `AnnoDominiCard`
-        The cards in the stack.
-    board : `list` of `AnnoDominiCard`
-        The cards played to the game board.
-    board_no : `int`
-        The number of boards played.
+    topics : `list` of `str`
+        Topics the cards are drawn from.
     board_embed : `discord.Message`
         Reference to message where the current board is embedded.
     live : `Bool`
@@ -169,51 +141,52 @@ class AnnoDominiGame:
         Link to the logger.
     msg : `str`
         Current message ready to be sent.
+    counters : `AnnoDominiCardCounters`
+        Card statistics of the deck in use.
+    winner : `AnnoDominiPlayer`
+        The player who won the game, once somebody has.
+    settings : `AnnoDominiSettings`
+        The server’s settings, from the moment the game started.
     """
-    def __init__(self, parent, ctx, topics: list):
+    def __init__(self, parent, channel, topics: list, gid: int = None):
+        super().__init__()
         self.cog = parent
-        self.ctx = ctx
-        self.gid = self._generate_id()
+        self.channel = channel
+        self.guild = channel.guild
+        self.gid = gid if gid is not None else self._generate_id()
         self.starttime = int(time.time())
-        self.players = []
-        self.turn_order = 0
         self.topics = topics
-        self.cards = []
-        self.board = []
-        self.board_no = 0
         self.board_embed = None
         self.live = False
         self.log = logging.getLogger('red.redarmycogs.annodomini')
         self.msg = ''
         self._last_play = int(time.time())  # TODO: integrate this?
+        self._idle_turns = 0
         self._task = None
+        self.counters = None
+        self.winner = None
+        self.settings = None
 
     def _generate_id(self):
         """
         Generate a unique game id for running multiple games.
         """
-        if len(self.cog.games) == 9000:
-            raise TooManyGamesException("Games full!")
-        games = [game.gid for game in self.cog.games]
-        while True:
-            gid = random.randint(1000, 9999)
-            if gid not in games:
-                return gid
+        return self.cog.games.allocate_id()
 
     async def send_error(self):
         """
         Sends a message to the channel after an error.
         """
-        await self.ctx.send(
+        await self.channel.send(
             'A fatal error has occurred in _Anno Domini_, shutting down.'
         )
 
     async def send_timeout(self):
         """
-        Cleanup code when a user times out.
+        Cleanup code when every player has timed out.
         """
-        await self.ctx.send(
-            'You did not respond in time. Shutting down.'
+        await self.channel.send(
+            'Nobody responded in time. Shutting down.'
         )
 
     def error_callback(self, fut):
@@ -232,16 +205,24 @@ class AnnoDominiGame:
             self.log.exception(msg)
             stack = ''.join(traceback.TracebackException.from_exception(exc).format())
             self.log.exception(stack)
-        try:
-            self.cog.games.remove(self)
-        except ValueError:
-            pass
+        self.cog.renderer.release(self.board_embed)
+        for player in self.players:
+            self.cog.renderer.release(player.card_embed)
+        self.cog.games.remove(self)
+        if self.recorder and not self.cog.unloading:
+            winner = next((idx for idx, player in enumerate(self.players)
+                           if not player.cards), 255)
+            self.recorder(EVENT_END, winner)
+        if not self.cog.unloading:
+            asyncio.create_task(self.cog.snapshots.delete(self.gid))
 
     async def setup(self):
         """
         Sets up and starts a game of Anno Domini.
         """
         self.live = True
+        self.recorder = self.cog.movelog.recorder(self.gid)
+        self.settings = await AnnoDominiSettings.load(self.cog.config, self.guild)
         await self.get_topic_cards()
         await self.dealcards()
         await self.showhands()
@@ -249,69 +230,182 @@ class AnnoDominiGame:
         self._task = asyncio.create_task(self.run())
         self._task.add_done_callback(self.error_callback)
 
-    def validate_cmd(self, m):
+    @classmethod
+    async def restore(cls, parent, channel, snapshot, deck):
         """
-        Check on messages to see whether they are valid commands.
+        Rebuild a game from a snapshot.
+
+        Parameters
+        ----------
+        parent : `commands.Cog`
+            A reference to the parent cog.
+        channel : `discord.TextChannel`
+            Channel the game was played in.
+        snapshot : `AnnoDominiSnapshot`
+            The saved game state.
+        deck : `AnnoDominiDeck`
+            The deck the snapshot's card indices refer to.
+        """
+        game = cls(parent, channel, snapshot.topics, gid=snapshot.gid)
+        game.live = True
+        game.recorder = parent.movelog.recorder(game.gid)
+        game.settings = await AnnoDominiSettings.load(parent.config, game.guild)
+        game.deck = deck
+        game.counters = await parent.cardstats.counters(deck)
+        game.cards = list(snapshot.stack)
+        for saved in snapshot.players:
+            if saved.bot:
+                ai = AnnoDominiAI(noise=saved.noise, caution=saved.caution)
+                player = AnnoDominiBotPlayer(saved.name, ai)
+            else:
+                member = game.guild.get_member(saved.member_id) \
+                    or await game.guild.fetch_member(saved.member_id)
+                player = AnnoDominiPlayer(member, owner=saved.owner)
+                if saved.message_id:
+                    dm = member.dm_channel or await member.create_dm()
+                    player.card_embed = dm.get_partial_message(saved.message_id)
+            player.cards = [deck[idx] for idx in saved.hand]
+            game.players.append(player)
+        game.set_board([deck[idx] for idx in snapshot.board],
+                       snapshot.last_position)
+        game.board_no = snapshot.board_no
+        game.turn_order = snapshot.turn_order
+        game._idle_turns = snapshot.idle_turns
+        if snapshot.board_message_id:
+            game.board_embed = channel.get_partial_message(
+                snapshot.board_message_id)
+        return game
+
+    def resume(self):
+        """
+        Carries on a restored game from the turn it was saved at.
+        """
+        self._task = asyncio.create_task(self.run(resumed=True))
+        self._task.add_done_callback(self.error_callback)
 
-        Assumes commands must be one of:
-        * play `int` `int`
-        * play `int`
-        * challenge
+    async def save_snapshot(self):
         """
-        can_challenge = r"(?P<chal>challenge)|" if len(self.board) >= 2 else None
-        match = re.match(rf"{can_challenge or ''}play (?P<card>\d+)( (?P<pos>\d+))?", m)
-        if not match:
-            return False
-        if can_challenge and match.group("chal"):
-            return True
-        if int(match.group("card")) <= len(self.players[self.turn_order].cards) \
-            and not match.group("pos"):
-            return True
-        if int(match.group("card")) <= len(self.players[self.turn_order].cards) \
-            and int(match.group("pos")) <= len(self.board):
-            return True
+        Saves the game so it can be resumed after a reload.
+        """
+        try:
+            await self.cog.snapshots.save(self)
+        except OSError:
+            self.log.exception('Could not save Anno Domini snapshot.')
+
+    async def wait_for_move(self) -> tuple:
+        """
+        Wait for the current player to send a valid move.
+
+        Computer players decide straight away. The deadline and a
+        warning shortly before it run on the cog's shared timer wheel;
+        if the player doesn't move in time the move is ``("timeout",)``,
+        and if they leave the game it is ``("left",)``.
+        """
+        player = self.players[self.turn_order]
+        if player.bot:
+            return player.ai.choose_move(self)
+        member = player.member
+        router, timers = self.cog.router, self.cog.timers
+        future = router.expect(self, self.channel, member)
+        delay = self.settings.delay
+
+        def expire():
+            if not future.done():
+                future.set_result(("timeout",))
+
+        deadline = timers.schedule(delay, expire)
+        warning = None
+        if delay > 2 * TURN_WARNING:
+            warning = timers.schedule(
+                delay - TURN_WARNING,
+                lambda: asyncio.create_task(self.send_warning(player)))
+        try:
+            return await future
+        finally:
+            router.discard(self.channel, member, future)
+            timers.cancel(deadline)
+            timers.cancel(warning)
+
+    async def send_warning(self, player: AnnoDominiPlayer):
+        """
+        Warns a player their turn is about to run out.
+        """
+        await self.channel.send(
+            f"{player.member.mention}, you have {TURN_WARNING} seconds "
+            f"left to play!"
+        )
+
+    async def skip_turn(self):
+        """
+        Skips a player who ran out of time and deals them a penalty card.
+
+        Raises
+        ------
+        `asyncio.TimeoutError`
+            If every player in a row has run out of time.
+        """
+        player = self.players[self.turn_order]
+        self._idle_turns += 1
+        if self._idle_turns >= len(self.players):
+            raise asyncio.TimeoutError
+        self.resolve_timeout()
+        await self.channel.send(
+            f"{player.member.display_name} took too long and received "
+            f"a penalty card."
+        )
+        await self.showhands(player)
 
     async def check_winner(self):
         """
         Checks if the board is in a winning state and automatically
         challenges.
         """
-        chk_idx = self._get_previous_idx()
-        player = self.players[chk_idx]
-        if len(player.cards) == 0:
-            mention = await self.cog.config.guild(self.ctx.guild).doMention()
-            name = player.member.display_name
-            if mention:
-                mention = player.member.mention
-            win = await self.check_board()
-            self.newround()
-            if win:
-                await self.ctx.send(f'{name} is the winner!')
-                await self.update_scores()
-                return True
-            else:
-                await self.ctx.send(
-                    f"{name} played their last card "
-                    f"but the order was wrong! They "
-                    f"received 3 cards."
-                )
-                await self.dealcards(player, 3)
-                await self.showhands(player)
+        player = self.players[self._get_previous_idx()]
+        win = self.resolve_last_card()
+        if win is None:
+            return False
+        mention = self.settings.doMention
+        name = player.member.display_name
+        if mention:
+            name = player.member.mention
+        await self.check_board()
+        self.newround()
+        if win:
+            self.winner = player
+            await self.channel.send(f'{name} is the winner!')
+            await self.update_scores()
+            return True
+        await self.channel.send(
+            f"{name} played their last card "
+            f"but the order was wrong! They "
+            f"received 3 cards."
+        )
+        await self.showhands(player)
         return False
 
-    async def run(self):
+    async def run(self, resumed: bool = False):
         """
         Sets up and runs the game.
+
+        Parameters
+        ----------
+        resumed : `bool`
+            The game was restored from a snapshot, so the current
+            player’s turn has already started.
         """
+        if resumed:
+            await self.channel.send(f"Game #{self.gid} has resumed!")
+        started = resumed  # the current player's turn has already started
         while self.live:
-            self.turn_order += 1
-            if self.turn_order >= len(self.players):
-                self.turn_order = 0
-            check_winner = await self.check_winner()
-            if check_winner:
-                break
+            if started:
+                started = False
+            else:
+                self.next_turn()
+                check_winner = await self.check_winner()
+                if check_winner:
+                    break
             await self.showboard()
-            mention = await self.cog.config.guild(self.ctx.guild).doMention()
+            mention = self.settings.doMention
             player = self.players[self.turn_order]
             name = player.member.display_name
             if mention:
@@ -323,42 +417,33 @@ class AnnoDominiGame:
             else:
                 self.msg += '.'
             await self.send()
-            choice = await self.ctx.bot.wait_for(
-                            'message',
-                            timeout=await self.cog.config.guild(self.ctx.guild).delay(),
-                            check=lambda m: (
-                            m.author.id == self.players[self.turn_order].member.id
-                            and m.channel == self.ctx.channel
-                            and self.validate_cmd(m.content.lower())
-                        ))
-            choice = re.match(r"(?P<chal>challenge)|play (?P<card>\d+)( (?P<pos>\d+))?", choice.content.lower())
-            if choice.group("chal"):
+            await self.save_snapshot()
+            move = await self.wait_for_move()
+            if move[0] == "left":
+                started = True  # leave() has passed the turn on already
+                continue
+            if move[0] == "timeout":
+                await self.skip_turn()
+                continue
+            self._idle_turns = 0
+            if move[0] == "challenge":
                 successful_challenge = await self.challenge()
                 self.newround()
                 await self.showboard()
                 if successful_challenge:
-                    choice = await self.ctx.bot.wait_for(
-                            'message',
-                            timeout=await self.cog.config.guild(self.ctx.guild).delay(),
-                            check=lambda m: (
-                                m.author.id == self.players[self.turn_order].member.id
-                                and m.channel == self.ctx.channel
-                                and self.validate_cmd(m.content.lower())
-                            )
-                        )
-                    choice = re.match(r"play (?P<card>\d+)( (?P<pos>\d+))?", choice.content.lower())
-                    card = int(choice.group("card"))
-                    pos = 0
-                    if choice.group("pos"):
-                        pos = int(choice.group("pos"))
+                    move = await self.wait_for_move()
+                    if move[0] == "left":
+                        started = True
+                        continue
+                    if move[0] == "timeout":
+                        await self.skip_turn()
+                        continue
+                    _, card, pos = move
                     self.playcard(card, pos)
                     await self.showhands(self.players[self.turn_order])
                     await self.showboard()
-            elif choice.group("card"):
-                card = int(choice.group("card"))
-                pos = 0
-                if choice.group("pos"):
-                    pos = int(choice.group("pos"))
+            else:
+                _, card, pos = move
                 self.playcard(card, pos)
                 await self.showhands(self.players[self.turn_order])
                 await self.showboard()
@@ -368,80 +453,63 @@ class AnnoDominiGame:
         Safely send messages.
         """
         for page in pagify(self.msg):
-            await self.ctx.send(page)
+            await self.channel.send(page)
         self.msg = ''
 
     async def get_topic_cards(self):
         """
         Fills the stack with cards for the game.
         """
-        language = await self.cog.config.guild(self.ctx.guild).language()
-        sourcefile = Path.joinpath(data_manager.bundled_data_path(self),
-                                   f"data-{language}.csv")
-        with open(sourcefile, "r", encoding="utf8") as source:  # TODO: detect encoding
-            reader = csv.DictReader(source, delimiter=",")
-            for row in reader:
-                if row["topic"] in self.topics:
-                    self.cards.append(
-                        AnnoDominiCard(**row)
-                    )
-        random.shuffle(self.cards)
-
-    def playcard(self, card: int, position: int):
-        """
-        Play a card to the game board.
-
-        Parameters
-        ----------
-        card : `int`
-            Card in player’s hand (1-indexed)
-        position : `int`
-            Location to play that card on board (0-indexed)
-        """
-        player = self.players[self.turn_order]
-        card = player.cards.pop(card-1)
-        self.board.insert(position, card)
+        size = max(MIN_DECK_SIZE, len(self.players) * self.settings.startinghand * 4)
+        deck = await self.cog.decks.get(self.settings.language)
+        self.counters = await self.cog.cardstats.counters(deck)
+        self.fill_stack(deck, self.topics, size,
+                        self.counters.weights(self.settings.difficulty))
 
     async def challenge(self):
         """
         Challenge the order of cards on the board.
         """
-        mention = await self.cog.config.guild(self.ctx.guild).doMention()
+        mention = self.settings.doMention
         chall_idx = self._get_previous_idx()
         challenger, challenged = self.players[self.turn_order], self.players[chall_idx]
-        correct = await self.check_board()
+        successful = self.resolve_challenge()
+        await self.check_board(challenged=True)
         challenger_name, challenged_name = challenger.member.display_name, challenged.member.display_name
         if mention:
             challenger_name, challenged_name = challenger.member.mention, challenged.member.mention
-        if correct:
+        if not successful:
             self.msg = f"The order was correct! {challenger_name} received two cards."
             await self.send()
-            await self.dealcards(challenger, 2)
             await self.showhands(challenger)
             return False
         self.msg = f"The order was wrong! {challenged_name} received three cards. " \
                    f"{challenger_name} may now play a card."
         await self.send()
-        await self.dealcards(challenged, 3)
         await self.showhands(challenged)
         return True
 
-    async def check_board(self):
+    async def check_board(self, challenged: bool = False):
         """
-        Check if the cards on the board are in the correct order.
+        Reveal the board, showing whether the order was correct, and
+        count the revealed cards in the card statistics.
+
+        Parameters
+        ----------
+        challenged : `bool`
+            Whether the board is revealed because of a challenge.
 
         Returns
         -------
         `bool`
             True if order was correct, False if not.
         """
-        if self.board == sorted(self.board):
-            board_embed = await self._build_board_embed(reveal=True, correct=True)
-            await self.revealboard(board_embed)
-            return True
-        board_embed = await self._build_board_embed(reveal=True, correct=False)
+        correct = self.board_correct()
+        if self.counters is not None:
+            self.cog.cardstats.reveal(self.counters, self.placements, challenged)
+        board_embed = await self._build_board_embed(reveal=True, correct=correct)
         await self.revealboard(board_embed)
-        return False
+        return correct
 
     async def dealcards(self, player: AnnoDominiPlayer = None, count: int = None):
         """
@@ -456,21 +524,9 @@ class AnnoDominiGame:
             Number of cards to deal that person.
         """
         if not player:  # assume new game
-            startinghand = await self.cog.config.guild(self.ctx.guild).startinghand()
-            for player in self.players:
-                for _ in range(startinghand):
-                    try:
-                        player.cards.append(
-                            self.cards.pop())
-                    except IndexError:
-                        pass  # TODO: no cards left?!
+            self.deal_starting_hands(self.settings.startinghand)
         elif player:  # deal extra cards to player
-            for _ in range(count):
-                try:
-                    player.cards.append(  # TODO: refactor to method
-                        self.cards.pop())
-                except IndexError:
-                    pass  # TODO: no cards left!
+            self.deal(player, count)
 
     async def showhands(self, player=None):
         """
@@ -486,12 +542,31 @@ class AnnoDominiGame:
             players = [player]
         else:
             players = self.players
-        for player in players:
-            hand_embed = await self._build_hand_embed(player)
-            if player.card_embed is None:
-                player.card_embed = await player.member.send(embed=hand_embed)
-            else:
-                await player.card_embed.edit(embed=hand_embed)
+        await asyncio.gather(*(
+            self._showhand(player) for player in players if not player.bot))
+
+    async def _showhand(self, player: AnnoDominiPlayer):
+        """
+        Send or update one player’s hand, keeping any failure to that player.
+        """
+        hand_embed = await self._build_hand_embed(player)
+        renderer = self.cog.renderer
+        async with renderer.dm_slots:
+            started = time.perf_counter()
+            try:
+                if player.card_embed is None:
+                    player.card_embed = await renderer.send(player.member, hand_embed)
+                else:
+                    await renderer.edit(player.card_embed, hand_embed)
+            except discord.Forbidden:
+                await self.channel.send(
+                    f"{player.member.mention}, I can’t send you your cards! "
+                    f"Please allow direct messages from server members.")
+            except discord.HTTPException:
+                self.log.exception(
+                    f"Could not send {player.member.display_name} their hand.")
+            finally:
+                renderer.dm_latencies.append(time.perf_counter() - started)
 
     async def _build_hand_embed(self, player):
         """
@@ -511,11 +586,9 @@ class AnnoDominiGame:
         """
         Starts a new round of the game.
         """
-        self.board_no += 1
+        self.cog.renderer.release(self.board_embed)
         self.board_embed = None
-        self.board = []
-        self.board.append(self.cards.pop())
-        return
+        super().newround()
 
     async def showboard(self):
         """
@@ -523,28 +596,25 @@ class AnnoDominiGame:
         """
         board_embed = await self._build_board_embed()
         if self.board_embed is None:
-            self.board_embed = await self.ctx.channel.send(embed=board_embed)
+            self.board_embed = await self.cog.renderer.send(
+                self.channel, board_embed)
         else:
-            await self.board_embed.edit(embed=board_embed)
+            await self.cog.renderer.edit(self.board_embed, board_embed)
 
     async def revealboard(self, board_embed):
         """
         Updates the game board.
         """
-        # TODO: factor this out
-        await self.board_embed.edit(embed=board_embed)
-        return
+        await self.cog.renderer.edit(self.board_embed, board_embed, now=True)
 
     async def update_scores(self):
         """
         Run after a completed game to update players’ stats.
         """
-        for player in self.players:
-            stats = self.cog.config.member(player.member).all()
-            stats["games"] += 1
-            if len(player.cards) == 0:
-                stats["wins"] += 1
-            self.cog.config.member(player.member).set(stats)
+        await self.cog.ranking.record(self.guild, [
+            (player.member.id, not player.cards)
+            for player in self.players if not player.bot
+        ])
 
     async def _build_board_embed(self, reveal: bool = False,
                                  correct: bool = False):
@@ -579,34 +649,13 @@ class AnnoDominiGame:
                      f"to challenge the current order."
             )
         else:
+            first_error = self.first_error
             for idx, card in enumerate(self.board, 1):
-                date = self._build_human_readable_date(card.start, card.end)
+                marker = " ❌" if idx - 1 == first_error else ""
                 board_embed.add_field(
-                    name=f"Card #{idx} – {date}", value=f"{card.name}\n{card.desc}", inline=False
+                    name=f"Card #{idx} – {card.date}{marker}", value=f"{card.name}\n{card.desc}", inline=False
                 )
             board_embed.set_footer(
                 text=text
             )
         return board_embed
-
-    def _build_human_readable_date(self, start_date, end_date):
-        """
-        Return normal date from boundaries.
-        """
-        if start_date[1:3] == [1, 1] and end_date[1:3] == [12, 31]:
-            if start_date[0] == end_date[0]:
-                return str(start_date[0])
-            else:
-                return f"{str(start_date[0])}–{str(end_date[0])}"
-        elif start_date[1:3] == [1, 1] and end_date[1:3] == [1, 1] and abs(end_date[0] - start_date[0]) == 10:
-            return f"circa {str(start_date[0]+5)}"  # FIXME: if date is exactly 10 years?
-        elif start_date == end_date:
-            return f"{str(start_date[2])}.{str(start_date[1])}.{str(start_date[0])}"  # TODO: prettify this
-        else:
-            return f"{str(start_date[2])}.{str(start_date[1])}.{str(start_date[0])}–{str(end_date[2])}.{str(end_date[1])}.{str(end_date[0])}"
-
-    def _get_previous_idx(self):
-        """
-        Helper method to get the index of the previous player (when challenged).
-        """
-        return self.turn_order - 1 if self.turn_order > 0 else len(self.players) - 1
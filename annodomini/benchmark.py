@@ -0,0 +1,188 @@
+"""
+Benchmark for the headless Anno Domini rules engine.
+
+Plays seeded games between scripted players on a synthetic deck and
+reports how many turns per second the engine manages, along with
+per-turn latency percentiles. Run it with::
+
+    python -m annodomini.benchmark --games 1000 --players 4
+"""
+import argparse
+import random
+import statistics
+import time
+
+from .ai import AnnoDominiAI
+from .deck import AnnoDominiDeck
+from .engine import (
+    AnnoDominiCard,
+    AnnoDominiEngine,
+    AnnoDominiEnginePlayer
+)
+
+TOPICS = ["History", "Science", "Sport", "Culture"]
+
+
+class ScriptedPlayer(AnnoDominiEnginePlayer):
+    """
+    Player making random moves, challenging at a fixed rate.
+
+    Attributes
+    ----------
+    rng : `random.Random`
+        Source of the player's decisions.
+    challenge_rate : `float`
+        Chance of challenging whenever that is allowed.
+    """
+    def __init__(self, rng: random.Random, challenge_rate: float = 0.3):
+        super().__init__()
+        self.rng = rng
+        self.challenge_rate = challenge_rate
+
+    def choose(self, engine: AnnoDominiEngine) -> tuple:
+        """
+        Returns the player's next move.
+        """
+        if engine.validate_move(("challenge",)) \
+                and self.rng.random() < self.challenge_rate:
+            return ("challenge",)
+        return ("play",
+                self.rng.randint(1, len(self.cards)),
+                self.rng.randint(0, len(engine.board)))
+
+
+class AIPlayer(AnnoDominiEnginePlayer):
+    """
+    Player whose moves come from `AnnoDominiAI`.
+    """
+    def __init__(self, rng: random.Random, noise: float):
+        super().__init__()
+        self.ai = AnnoDominiAI(noise=noise, rng=rng)
+
+    def choose(self, engine: AnnoDominiEngine) -> tuple:
+        """
+        Returns the player's next move.
+        """
+        return self.ai.choose_move(engine)
+
+
+def make_deck(size: int, rng: random.Random) -> AnnoDominiDeck:
+    """
+    Build a deck of random events spread over five millennia.
+    """
+    cards = []
+    for cid in range(size):
+        year = rng.randint(-3000, 2020)
+        kind = rng.random()
+        if kind < 0.5:
+            start, end = str(year), ""
+        elif kind < 0.8:
+            start, end = f"{year}-{rng.randint(1, 12)}", ""
+        else:
+            start, end = str(year), str(year + rng.randint(1, 30))
+        cards.append(AnnoDominiCard(
+            str(cid), start, end, f"Event {cid}", "", rng.choice(TOPICS)))
+    return AnnoDominiDeck("benchmark", 0, cards)
+
+
+def play_turn(engine: AnnoDominiEngine) -> bool:
+    """
+    Play one turn, following the same steps as `AnnoDominiGame.run`.
+
+    Returns
+    -------
+    `bool`
+        True if the game has been won.
+    """
+    engine.next_turn()
+    win = engine.resolve_last_card()
+    if win is not None:
+        engine.newround()
+        if win:
+            return True
+    player = engine.players[engine.turn_order]
+    move = player.choose(engine)
+    if move[0] == "challenge":
+        successful = engine.resolve_challenge()
+        engine.newround()
+        if not successful:
+            return False
+        move = player.choose(engine)
+    _, card, position = move
+    engine.playcard(card, position)
+    return False
+
+
+def simulate(deck: AnnoDominiDeck, seed: int, players: int, hand: int,
+             max_turns: int, timings: list, noise: float = None) -> int:
+    """
+    Play a single seeded game, appending each turn's time (ns) to `timings`.
+
+    If `noise` is given the players are AIs with that much noise (in
+    years) on their knowledge, otherwise they play at random.
+
+    Returns
+    -------
+    `int`
+        Number of turns played.
+    """
+    rng = random.Random(seed)
+    engine = AnnoDominiEngine(rng)
+    if noise is None:
+        engine.players = [ScriptedPlayer(rng) for _ in range(players)]
+    else:
+        engine.players = [AIPlayer(rng, noise) for _ in range(players)]
+    engine.fill_stack(deck, TOPICS)
+    for player in engine.players:
+        engine.deal(player, hand)
+    engine.newround()
+    turns = 0
+    clock = time.perf_counter_ns
+    try:
+        while turns < max_turns:
+            start = clock()
+            won = play_turn(engine)
+            timings.append(clock() - start)
+            turns += 1
+            if won:
+                break
+    except IndexError:
+        pass  # the stack ran out
+    return turns
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Anno Domini rules engine.")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--hand", type=int, default=9)
+    parser.add_argument("--deck", type=int, default=2000)
+    parser.add_argument("--max-turns", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ai", type=float, default=None, metavar="NOISE",
+                        help="use AI players with this noise (in years)")
+    args = parser.parse_args(argv)
+
+    deck = make_deck(args.deck, random.Random(args.seed))
+    timings = []
+    turns = 0
+    start = time.perf_counter()
+    for game in range(args.games):
+        turns += simulate(deck, args.seed + game, args.players, args.hand,
+                          args.max_turns, timings, args.ai)
+    elapsed = time.perf_counter() - start
+
+    centiles = statistics.quantiles(timings, n=100)
+    print(f"games:        {args.games}")
+    print(f"turns:        {turns}")
+    print(f"elapsed:      {elapsed:.3f} s")
+    print(f"turns/s:      {turns / elapsed:,.0f}")
+    print(f"p50 latency:  {centiles[49] / 1000:.2f} µs")
+    print(f"p90 latency:  {centiles[89] / 1000:.2f} µs")
+    print(f"p99 latency:  {centiles[98] / 1000:.2f} µs")
+    print(f"max latency:  {max(timings) / 1000:.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
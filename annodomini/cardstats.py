@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import os
+import struct
+
+from array import array
+from pathlib import Path
+
+LENGTH = struct.Struct("<I")
+COUNTS = struct.Struct("<III")
+DIFFICULTIES = ("mixed", "easy", "hard")
+
+
+class AnnoDominiCardCounters:
+    """
+    How often each card of a deck has been played, placed correctly and
+    caught out by a challenge.
+
+    The counters are flat arrays indexed like the deck, so recording a
+    revealed card is a couple of array increments.
+
+    Attributes
+    ----------
+    deck : `AnnoDominiDeck`
+        Deck the counters belong to.
+    played : `array`
+        Number of times each card was played and then revealed.
+    correct : `array`
+        Number of those times the card was placed correctly.
+    caught : `array`
+        Number of times the card was misplaced and caught by a challenge.
+    """
+    def __init__(self, deck):
+        self.deck = deck
+        self.played = array("I", bytes(4 * len(deck)))
+        self.correct = array("I", bytes(4 * len(deck)))
+        self.caught = array("I", bytes(4 * len(deck)))
+
+    def reveal(self, placements, challenged: bool):
+        """
+        Count the cards played in a round once the board is revealed.
+
+        Parameters
+        ----------
+        placements : `list` of `tuple`
+            (card index, placed correctly) for every card played.
+        challenged : `bool`
+            Whether the board was revealed by a challenge.
+        """
+        played, correct, caught = self.played, self.correct, self.caught
+        for idx, ok in placements:
+            played[idx] += 1
+            if ok:
+                correct[idx] += 1
+            elif challenged:
+                caught[idx] += 1
+
+    def difficulty(self, idx: int) -> float:
+        """
+        Share of the times a card was misplaced.
+
+        The count is smoothed so cards that have hardly been played sit
+        near 0.5 rather than at either end.
+        """
+        return (self.played[idx] - self.correct[idx] + 1) / (self.played[idx] + 2)
+
+    def weights(self, difficulty: str) -> list:
+        """
+        Returns a weight per card for building a deck of that difficulty.
+        """
+        if difficulty == "hard":
+            return [self.difficulty(idx) for idx in range(len(self.deck))]
+        if difficulty == "easy":
+            return [1 - self.difficulty(idx) for idx in range(len(self.deck))]
+        return None
+
+    def ranked(self, hardest: bool = True, min_played: int = 5) -> list:
+        """
+        Returns the indices of the cards played at least `min_played`
+        times, hardest (or easiest) first.
+        """
+        indices = [idx for idx, count in enumerate(self.played) if count >= min_played]
+        indices.sort(key=self.difficulty, reverse=hardest)
+        return indices
+
+
+class AnnoDominiCardStats:
+    """
+    Keeps the card counters of every language and saves them to disk.
+
+    Counters live in memory and are written out in one batch, from the
+    default executor, at most every `interval` seconds after a change.
+    On disk the counts are keyed by card id, so they survive edits to
+    the deck's source file.
+
+    Attributes
+    ----------
+    path : `Path`
+        Folder holding one ``{language}.bin`` file per language.
+    """
+    def __init__(self, path: Path, interval: float = 60.0):
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.interval = interval
+        self.log = logging.getLogger('red.redarmycogs.annodomini')
+        self._counters = {}
+        self._dirty = set()
+        self._task = None
+
+    async def counters(self, deck) -> AnnoDominiCardCounters:
+        """
+        Returns the counters for a deck, loading them if necessary.
+        """
+        counters = self._counters.get(deck.language)
+        if counters is not None and counters.deck is deck:
+            return counters
+        if counters is not None:
+            saved = self._to_dict(counters)  # the deck was reloaded
+        else:
+            loop = asyncio.get_running_loop()
+            saved = await loop.run_in_executor(None, self._read, deck.language)
+        counters = self._counters.get(deck.language)
+        if counters is not None and counters.deck is deck:
+            return counters  # loaded while we were waiting
+        counters = AnnoDominiCardCounters(deck)
+        for idx in range(len(deck)):
+            cid = deck.cid(idx)
+            if cid in saved:
+                (counters.played[idx], counters.correct[idx],
+                 counters.caught[idx]) = saved[cid]
+        self._counters[deck.language] = counters
+        return counters
+
+    def reveal(self, counters: AnnoDominiCardCounters, placements, challenged: bool):
+        """
+        Count a revealed board and schedule the counters to be saved.
+        """
+        if not placements:
+            return
+        counters.reveal(placements, challenged)
+        self._dirty.add(counters.deck.language)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._save_later())
+
+    def close(self):
+        """
+        Write out unsaved counters synchronously, e.g. when the cog unloads.
+        """
+        if self._task is not None:
+            self._task.cancel()
+        for language, data in self._take():
+            self._write(language, data)
+
+    def _take(self) -> list:
+        batch = [(language, self._dump(self._counters[language]))
+                 for language in self._dirty]
+        self._dirty.clear()
+        return batch
+
+    async def _save_later(self):
+        await asyncio.sleep(self.interval)
+        loop = asyncio.get_running_loop()
+        for language, data in self._take():
+            try:
+                await loop.run_in_executor(None, self._write, language, data)
+            except OSError:
+                self.log.exception(f"Could not save card stats for {language}.")
+
+    @staticmethod
+    def _to_dict(counters: AnnoDominiCardCounters) -> dict:
+        return {
+            counters.deck.cid(idx):
+                (counters.played[idx], counters.correct[idx], counters.caught[idx])
+            for idx, played in enumerate(counters.played)
+            if played
+        }
+
+    @staticmethod
+    def _dump(counters: AnnoDominiCardCounters) -> bytes:
+        counts = AnnoDominiCardStats._to_dict(counters)
+        parts = [LENGTH.pack(len(counts))]
+        for cid, values in counts.items():
+            data = cid.encode("utf8")
+            parts.append(LENGTH.pack(len(data)) + data + COUNTS.pack(*values))
+        return b"".join(parts)
+
+    def _file(self, language: str) -> Path:
+        return Path.joinpath(self.path, f"{language}.bin")
+
+    def _write(self, language: str, data: bytes):
+        tmp = Path.joinpath(self.path, f"{language}.bin.tmp")
+        with open(tmp, "wb") as fp:
+            fp.write(data)
+        os.replace(tmp, self._file(language))
+
+    def _read(self, language: str) -> dict:
+        try:
+            data = self._file(language).read_bytes()
+        except FileNotFoundError:
+            return {}
+        saved = {}
+        try:
+            (count,) = LENGTH.unpack_from(data)
+            offset = LENGTH.size
+            for _ in range(count):
+                (length,) = LENGTH.unpack_from(data, offset)
+                offset += LENGTH.size
+                cid = data[offset:offset+length].decode("utf8")
+                offset += length
+                saved[cid] = COUNTS.unpack_from(data, offset)
+                offset += COUNTS.size
+        except (struct.error, UnicodeDecodeError):
+            self.log.exception(f"Card stats for {language} are corrupt, starting over.")
+            return {}
+        return saved
@@ -0,0 +1,302 @@
+import asyncio
+import bisect
+import csv
+import itertools
+import logging
+import random
+import re
+
+from array import array
+from pathlib import Path
+
+from . import deckfile
+from .deckfile import FIELDS, AnnoDominiDeckFile
+from .engine import AnnoDominiCard
+
+OVERLAP_RETRIES = 4
+MAX_OVERLAPS = 1
+
+
+class AnnoDominiDeck:
+    """
+    All the cards available for one language, grouped by topic.
+
+    Cards are parsed once when the deck is loaded and shared by every
+    game using that language, so games only ever hold indices into
+    the deck. The card dates are also kept in flat arrays, with each
+    topic's cards sorted by date, for building balanced decks.
+
+    Attributes
+    ----------
+    language : `str`
+        Language code of the source file.
+    mtime : `int`
+        Modification time (ns) of the source file when it was loaded.
+    cards : `list` of `AnnoDominiCard`
+        Every card in the source file.
+    topics : `dict`
+        Maps each topic to a `list` of indices into `cards`.
+    starts : `array`
+        Start date (day ordinal) of each card.
+    ends : `array`
+        End date (day ordinal) of each card.
+    """
+    def __init__(self, language: str, mtime: int, cards: list):
+        self.language = language
+        self.mtime = mtime
+        self.cards = cards
+        self.topics = {}
+        for idx, card in enumerate(cards):
+            card.idx = idx
+            self.topics.setdefault(card.topic, []).append(idx)
+        self.starts = array("q", (card.start for card in cards))
+        self.ends = array("q", (card.end for card in cards))
+        self._by_date = {
+            topic: sorted(indices, key=self._midpoint)
+            for topic, indices in self.topics.items()
+        }
+
+    def __getitem__(self, idx: int) -> AnnoDominiCard:
+        return self.cards[idx]
+
+    def __len__(self):
+        return len(self.cards)
+
+    def cid(self, idx: int) -> str:
+        """
+        Returns the card id of a card.
+        """
+        return self.cards[idx].cid
+
+    def indices(self, topics) -> list:
+        """
+        Returns a fresh list of card indices for the chosen topics.
+        """
+        indices = []
+        for topic in dict.fromkeys(topics):
+            indices.extend(self.topics.get(topic, ()))
+        return indices
+
+    def balanced(self, topics, size: int, rng: random.Random = random,
+                 weights=None) -> list:
+        """
+        Returns about `size` card indices from the chosen topics, spread
+        out over time.
+
+        Each topic gets a share of the deck in proportion to its number
+        of cards. The topic's cards, already sorted by date, are cut
+        into that many strata and one card is drawn from each. No card
+        may overlap more than `MAX_OVERLAPS` other cards of its topic in
+        the deck: a card that would is drawn again a few times, then
+        the rest of the stratum is searched, and if nothing in it fits
+        the stratum is left out. If `weights` (one per card) are given,
+        cards within a stratum are drawn in proportion to their weight.
+        """
+        topics = list(dict.fromkeys(topics))
+        pool = sum(len(self.topics.get(topic, ())) for topic in topics)
+        if not pool:
+            return []
+        size = min(size, pool)
+        starts, ends = self.starts, self.ends
+        indices = []
+        for topic in topics:
+            ordered = self._by_date.get(topic, [])
+            quota = round(size * len(ordered) / pool)
+            if not quota:
+                continue
+            stride = len(ordered) / quota
+            # Strata are drawn in date order, so every card picked so far
+            # has an earlier midpoint than the candidate, and overlaps it
+            # exactly when it ends on or after the candidate's start.
+            picked = []  # (end, index) of the topic's cards, sorted by end
+            overlaps = {}
+
+            def clashes(idx):
+                found = picked[bisect.bisect_left(picked, (starts[idx],)):]
+                if len(found) > MAX_OVERLAPS or any(
+                        overlaps[other] >= MAX_OVERLAPS for _, other in found):
+                    return None
+                return found
+
+            for stratum in range(quota):
+                low = int(stratum * stride)
+                high = max(low + 1, int((stratum + 1) * stride))
+                if weights is not None:
+                    cumulative = list(itertools.accumulate(
+                        weights[idx] for idx in ordered[low:high]))
+                found = None
+                for _ in range(OVERLAP_RETRIES):
+                    if weights is None:
+                        idx = ordered[rng.randrange(low, high)]
+                    else:
+                        idx = rng.choices(ordered[low:high],
+                                          cum_weights=cumulative)[0]
+                    found = clashes(idx)
+                    if found is not None:
+                        break
+                else:
+                    offset = rng.randrange(high - low)
+                    for step in range(high - low):
+                        idx = ordered[low + (offset + step) % (high - low)]
+                        found = clashes(idx)
+                        if found is not None:
+                            break
+                    else:
+                        continue  # every card here overlaps too much
+                overlaps[idx] = len(found)
+                for _, other in found:
+                    overlaps[other] += 1
+                bisect.insort(picked, (ends[idx], idx))
+                indices.append(idx)
+        return indices
+
+    def _midpoint(self, idx: int) -> int:
+        return self.starts[idx] + self.ends[idx]
+
+
+class AnnoDominiCompiledDeck(AnnoDominiDeck):
+    """
+    A deck backed by a compiled deck file.
+
+    The date columns and topic lists are read straight from the file,
+    and a card object is only built the first time the card is drawn.
+
+    Attributes
+    ----------
+    file : `AnnoDominiDeckFile`
+        The compiled deck.
+    """
+    def __init__(self, language: str, deckfile: AnnoDominiDeckFile):
+        self.language = language
+        self.mtime = deckfile.mtime
+        self.file = deckfile
+        self.starts = deckfile.starts
+        self.ends = deckfile.ends
+        bounds = deckfile.topic_bounds
+        self.topics = {
+            topic: deckfile.order[bounds[number]:bounds[number+1]]
+            for number, topic in enumerate(deckfile.topic_names())
+        }
+        self._by_date = self.topics
+        self._topic_names = list(self.topics)
+        self._cards = {}
+
+    @property
+    def cards(self) -> list:
+        return [self[idx] for idx in range(len(self))]
+
+    def __getitem__(self, idx: int) -> AnnoDominiCard:
+        try:
+            return self._cards[idx]
+        except KeyError:
+            pass
+        cid, name, desc, date = self.file.card_fields(idx)
+        card = AnnoDominiCard.from_ordinals(
+            cid, self.starts[idx], self.ends[idx], name, desc,
+            self._topic_names[self.file.topic_ids[idx]], date)
+        card.idx = idx
+        self._cards[idx] = card
+        return card
+
+    def __len__(self):
+        return len(self.file)
+
+    def cid(self, idx: int) -> str:
+        return self.file.string(idx * FIELDS)
+
+
+class AnnoDominiDeckStore:
+    """
+    Process-wide cache of decks, loaded once per language.
+
+    A deck is only parsed again when its source file has changed on
+    disk. Parsing happens in the default executor to keep the event
+    loop free.
+
+    If a `cache` folder is given, each source file is compiled into a
+    deck file there the first time it is needed, and decks are mapped
+    from the compiled file from then on.
+
+    Attributes
+    ----------
+    path : `Path`
+        Folder containing the `data-{language}.csv` files.
+    cache : `Path`
+        Folder for compiled decks, or None to parse the source files.
+    """
+    def __init__(self, path: Path, cache: Path = None):
+        self.path = path
+        self.cache = cache
+        self.log = logging.getLogger('red.redarmycogs.annodomini')
+        self._decks = {}
+        self._locks = {}
+
+    def sourcefile(self, language: str) -> Path:
+        """
+        Returns the path of the source file for a language.
+        """
+        return Path.joinpath(self.path, f"data-{language}.csv")
+
+    def languages(self) -> list:
+        """
+        Returns a list of languages with a source file.
+        """
+        return [
+            re.sub(r"data-(\w+)\.csv", r"\1", p.name)
+            for p in self.path.iterdir()
+            if p.is_file() and p.name.endswith("csv")]
+
+    async def get(self, language: str) -> AnnoDominiDeck:
+        """
+        Returns the deck for a language, (re)loading it if necessary.
+        """
+        sourcefile = self.sourcefile(language)
+        mtime = sourcefile.stat().st_mtime_ns
+        deck = self._decks.get(language)
+        if deck is not None and deck.mtime == mtime:
+            return deck
+        lock = self._locks.setdefault(language, asyncio.Lock())
+        async with lock:
+            deck = self._decks.get(language)
+            if deck is not None and deck.mtime == mtime:
+                return deck  # loaded while we were waiting
+            loop = asyncio.get_running_loop()
+            deck = await loop.run_in_executor(
+                None, self._load, language, sourcefile, mtime)
+            self._decks[language] = deck
+            return deck
+
+    def _load(self, language: str, sourcefile: Path, mtime: int) -> AnnoDominiDeck:
+        """
+        Load the deck for a source file, compiling it first if the
+        compiled deck is missing or out of date.
+        """
+        if self.cache is None:
+            return self._parse(language, sourcefile, mtime)
+        compiled = Path.joinpath(self.cache, f"data-{language}.deck")
+        try:
+            current = deckfile.source_mtime(compiled) == mtime
+        except (OSError, ValueError):
+            current = False
+        if not current:
+            rows, errors = deckfile.read_source(sourcefile)
+            for error in errors:
+                self.log.warning(f"Skipping bad Anno Domini card: {error}")
+            try:
+                self.cache.mkdir(parents=True, exist_ok=True)
+                deckfile.write(compiled, deckfile.compile_rows(rows, mtime))
+            except OSError:
+                self.log.exception(f"Could not compile the {language} deck.")
+                cards = [AnnoDominiCard.from_ordinals(*row) for row in rows]
+                return AnnoDominiDeck(language, mtime, cards)
+        return AnnoDominiCompiledDeck(language, AnnoDominiDeckFile.open(compiled))
+
+    @staticmethod
+    def _parse(language: str, sourcefile: Path, mtime: int) -> AnnoDominiDeck:
+        """
+        Parse a source file into a deck.
+        """
+        with open(sourcefile, "r", encoding="utf8") as source:  # TODO: detect encoding
+            reader = csv.DictReader(source, delimiter=",")
+            cards = [AnnoDominiCard(**row) for row in reader]
+        return AnnoDominiDeck(language, mtime, cards)
@@ -0,0 +1,269 @@
+"""
+Compiled Anno Domini decks.
+
+A deck's CSV source is compiled once into a binary file that can be
+memory-mapped: the card dates sit in fixed-width day ordinal columns,
+each topic's cards are listed in date order, and all the text lives in
+one UTF-8 blob reached through an offset table. Loading a compiled
+deck parses nothing, and card objects are only built when a card is
+dealt.
+
+The cog compiles decks by itself whenever a source file changes; the
+command line tool checks or compiles source files by hand::
+
+    python -m annodomini.deckfile validate data/data-en.csv
+    python -m annodomini.deckfile compile data/data-en.csv -o data-en.deck
+"""
+import argparse
+import csv
+import mmap
+import os
+import struct
+import sys
+
+from array import array
+from pathlib import Path
+
+from .engine import (
+    _build_human_readable_date,
+    _days_in_month,
+    _parse_date,
+    _to_ordinal
+)
+
+MAGIC = b"ADD1"
+HEADER = struct.Struct("<4sIIIq")
+FIELDS = 4  # cid, name, desc, date
+
+
+class AnnoDominiDeckFile:
+    """
+    Read-only view of a compiled deck.
+
+    Every column is a `memoryview` straight onto the underlying buffer,
+    so nothing is copied.
+
+    Attributes
+    ----------
+    mtime : `int`
+        Modification time (ns) of the source file the deck was compiled from.
+    starts : `memoryview`
+        Start date (day ordinal) of each card.
+    ends : `memoryview`
+        End date (day ordinal) of each card.
+    order : `memoryview`
+        Card indices grouped by topic, each group sorted by date.
+    topic_bounds : `memoryview`
+        Where each topic's group starts in `order`, plus the end.
+    topic_ids : `memoryview`
+        Topic number of each card.
+
+    Raises
+    ------
+    `ValueError`
+        If the buffer is not a compiled deck.
+    """
+    def __init__(self, buffer):
+        view = memoryview(buffer)
+        try:
+            magic, count, topics, blob_size, self.mtime = HEADER.unpack_from(view)
+        except struct.error as exc:
+            raise ValueError("Truncated Anno Domini deck.") from exc
+        if magic != MAGIC:
+            raise ValueError("Not a compiled Anno Domini deck.")
+        self._count = count
+        self._topics = topics
+        offset = HEADER.size
+        sections = []
+        for fmt, length in (("q", count), ("q", count), ("I", count),
+                            ("I", topics + 1), ("I", FIELDS * count + topics + 1),
+                            ("H", count), ("B", blob_size)):
+            end = offset + length * struct.calcsize(fmt)
+            if end > len(view):
+                raise ValueError("Truncated Anno Domini deck.")
+            sections.append(view[offset:end].cast(fmt))
+            offset = end
+        (self.starts, self.ends, self.order, self.topic_bounds,
+         self._offsets, self.topic_ids, self._blob) = sections
+
+    def __len__(self):
+        return self._count
+
+    def string(self, idx: int) -> str:
+        """
+        Returns one string from the text blob.
+        """
+        return str(self._blob[self._offsets[idx]:self._offsets[idx+1]], "utf8")
+
+    def card_fields(self, idx: int) -> tuple:
+        """
+        Returns the cid, name, description and date text of a card.
+        """
+        first = idx * FIELDS
+        return tuple(self.string(first + field) for field in range(FIELDS))
+
+    def topic_names(self) -> list:
+        """
+        Returns the topic names, in topic number order.
+        """
+        first = FIELDS * self._count
+        return [self.string(first + topic) for topic in range(self._topics)]
+
+    @classmethod
+    def open(cls, path: Path) -> "AnnoDominiDeckFile":
+        """
+        Memory-map a compiled deck file.
+        """
+        with open(path, "rb") as fp:
+            buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer)
+
+
+def source_mtime(path: Path) -> int:
+    """
+    Returns the source file modification time recorded in a compiled
+    deck, reading only its header.
+
+    Raises
+    ------
+    `ValueError`
+        If the file is not a compiled deck.
+    """
+    with open(path, "rb") as fp:
+        header = fp.read(HEADER.size)
+    if len(header) < HEADER.size or header[:4] != MAGIC:
+        raise ValueError("Not a compiled Anno Domini deck.")
+    return HEADER.unpack(header)[4]
+
+
+def parse_row(row: dict) -> tuple:
+    """
+    Check one row of a source file and work out its dates.
+
+    Returns
+    -------
+    `tuple`
+        (cid, start ordinal, end ordinal, name, desc, topic, date text)
+
+    Raises
+    ------
+    `ValueError`
+        If the row is missing a field or has an impossible date.
+    """
+    for field in ("cid", "start", "name", "topic"):
+        if not row.get(field):
+            raise ValueError(f"missing {field}")
+    try:
+        start = _parse_date(row["start"])
+        end = _parse_date(row["end"]) if row.get("end") \
+            else _parse_date(row["start"], end=True)
+    except IndexError as exc:
+        raise ValueError("month out of range") from exc
+    for date in (start, end):
+        year, month, day = date
+        if not 1 <= month <= 12 or not 1 <= day <= _days_in_month(year, month):
+            raise ValueError(f"no such date {day}.{month}.{year}")
+    if end < start:
+        raise ValueError("ends before it starts")
+    return (row["cid"], _to_ordinal(*start), _to_ordinal(*end), row["name"],
+            row.get("desc") or "", row["topic"], _build_human_readable_date(start, end))
+
+
+def read_source(sourcefile: Path) -> tuple:
+    """
+    Parse a source file, collecting every bad row instead of stopping
+    at the first.
+
+    Returns
+    -------
+    `tuple`
+        (list of parsed rows, list of error messages)
+    """
+    rows, errors = [], []
+    with open(sourcefile, "r", encoding="utf8", newline="") as source:
+        reader = csv.DictReader(source, delimiter=",")
+        for row in reader:
+            try:
+                rows.append(parse_row(row))
+            except ValueError as exc:
+                errors.append(f"{sourcefile.name}:{reader.line_num}: "
+                              f"card {row.get('cid') or '?'}: {exc}")
+    return rows, errors
+
+
+def compile_rows(rows: list, mtime: int) -> bytes:
+    """
+    Build a compiled deck from parsed rows.
+    """
+    topics = list(dict.fromkeys(row[5] for row in rows))
+    topic_ids = {topic: number for number, topic in enumerate(topics)}
+    starts = array("q", (row[1] for row in rows))
+    ends = array("q", (row[2] for row in rows))
+    order = array("I")
+    topic_bounds = array("I")
+    for topic in topics:
+        topic_bounds.append(len(order))
+        indices = [idx for idx, row in enumerate(rows) if row[5] == topic]
+        indices.sort(key=lambda idx: starts[idx] + ends[idx])
+        order.extend(indices)
+    topic_bounds.append(len(order))
+    strings = [field for row in rows for field in (row[0], row[3], row[4], row[6])]
+    strings.extend(topics)
+    blob = bytearray()
+    offsets = array("I", [0])
+    for string in strings:
+        blob += string.encode("utf8")
+        offsets.append(len(blob))
+    parts = [
+        HEADER.pack(MAGIC, len(rows), len(topics), len(blob), mtime),
+        starts.tobytes(), ends.tobytes(), order.tobytes(), topic_bounds.tobytes(),
+        offsets.tobytes(), array("H", (topic_ids[row[5]] for row in rows)).tobytes(),
+        bytes(blob)
+    ]
+    return b"".join(parts)
+
+
+def write(path: Path, data: bytes):
+    """
+    Write a compiled deck, replacing any old one in a single step.
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as fp:
+        fp.write(data)
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Check or compile Anno Domini deck source files.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    validate = subparsers.add_parser("validate", help="check source files for bad rows")
+    validate.add_argument("sources", type=Path, nargs="+")
+    compile_ = subparsers.add_parser("compile", help="compile a source file")
+    compile_.add_argument("source", type=Path)
+    compile_.add_argument("-o", "--output", type=Path,
+                          help="defaults to the source file with a .deck suffix")
+    args = parser.parse_args(argv)
+
+    failed = False
+    sources = args.sources if args.command == "validate" else [args.source]
+    for source in sources:
+        rows, errors = read_source(source)
+        for error in errors:
+            print(error, file=sys.stderr)
+        if errors:
+            failed = True
+            print(f"{source}: {len(errors)} bad rows", file=sys.stderr)
+            continue
+        if args.command == "compile":
+            output = args.output or source.with_suffix(".deck")
+            write(output, compile_rows(rows, source.stat().st_mtime_ns))
+            print(f"{source}: {len(rows)} cards compiled to {output}")
+        else:
+            print(f"{source}: {len(rows)} cards ok")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
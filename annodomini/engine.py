@@ -0,0 +1,495 @@
+import bisect
+import calendar
+import itertools
+import math
+import random
+import re
+
+from .movelog import (
+    EVENT_CHALLENGE,
+    EVENT_DEAL,
+    EVENT_LAST_CARD,
+    EVENT_PLAY,
+    EVENT_ROUND,
+    EVENT_TIMEOUT
+)
+
+CHALLENGER_PENALTY = 2
+CHALLENGED_PENALTY = 3
+TIMEOUT_PENALTY = 1
+REFILL_SIZE = 100
+
+
+class AnnoDominiCard:
+    """
+    Simple class to embody an Anno Domini card.
+
+    The card holds information displayed to the players and
+    then revealed when an order is challenged. The start and
+    end dates are used in comparisons to check the order is
+    legitimate. Dates are parsed once, when the card is loaded,
+    into proleptic Gregorian day ordinals so comparisons are
+    plain integer checks.
+
+    Attributes
+    ----------
+    cid : `str`
+        Card ID number
+    start : `int`
+        Day ordinal of the first day of the event
+    end : `int`
+        Day ordinal of the last day of the event
+    name : `str`
+        The teaser information on the obverse of a card
+    desc : `str`
+        The revealed information on the reverse of a card
+    topic : `str`
+        Category of event
+    date : `str`
+        Human readable date shown when the card is revealed
+    idx : `int`
+        Position of the card in its deck, set when the deck is built
+    """
+    __slots__ = ("cid", "start", "end", "name", "desc", "topic", "date", "idx")
+
+    def __init__(self, cid: str, start: str, end: str,
+                 name: str, desc: str, topic: str):
+        self.cid = cid
+        start_date = _parse_date(start)
+        if end:
+            end_date = _parse_date(end)
+        else:
+            end_date = _parse_date(start, end=True)
+        self.start = _to_ordinal(*start_date)
+        self.end = _to_ordinal(*end_date)
+        self.name = name
+        self.desc = desc
+        self.topic = topic
+        self.date = _build_human_readable_date(start_date, end_date)
+        self.idx = None
+
+    @classmethod
+    def from_ordinals(cls, cid: str, start: int, end: int, name: str,
+                      desc: str, topic: str, date: str) -> "AnnoDominiCard":
+        """
+        Build a card whose dates have already been worked out, e.g. from
+        a compiled deck.
+        """
+        card = cls.__new__(cls)
+        card.cid = cid
+        card.start = start
+        card.end = end
+        card.name = name
+        card.desc = desc
+        card.topic = topic
+        card.date = date
+        card.idx = None
+        return card
+
+    def __lt__(self, x):
+        """
+        Date A is earlier than date B if it both started and
+        ended before date B.
+        """
+        return self.start <= x.start and self.end <= x.start
+
+    def __le__(self, x):
+        """
+        Date A and date B are overlapping if:
+        * date A occurred entirely during date B
+        * date B occurred entirely during date A
+        * date A ended after date B started but before B ended
+        * date A started before date B ended and after A started
+        """
+        return ((self.start <= x.start and self.end >= x.end) or
+                (self.start >= x.start and self.end <= x.end) or
+                (self.start >= x.start and self.start <= x.end) or
+                (self.end >= x.start and self.end <= x.end))
+
+
+DATE_SEPARATORS = re.compile(r"(?<!^)-|[/.]")
+
+
+def _parse_date(date: str, end: bool = False) -> tuple:
+    """
+    Helper function to convert human input dates into simple tuples.
+
+    If no end date is provided, we build it based on the start date.
+    Unspecific dates are automatically extended to the correct range.
+    """
+    date = [int(x) for x in DATE_SEPARATORS.split(date)]
+    if not end:
+        if len(date) == 1:
+            date.extend([1, 1])
+        if len(date) == 2:
+            date.extend([1])
+    else:
+        if len(date) == 1:
+            date.extend([12, 31])
+        if len(date) == 2:
+            date.extend([_days_in_month(date[0], date[1])])
+    return tuple(date)
+
+
+def _days_in_month(year: int, month: int) -> int:
+    """
+    Number of days in the month, using proleptic Gregorian leap years.
+    """
+    if month == 2 and calendar.isleap(year):
+        return 29
+    return calendar.mdays[month]
+
+
+def _to_ordinal(year: int, month: int, day: int) -> int:
+    """
+    Convert a date to a proleptic Gregorian day ordinal.
+
+    Matches `datetime.date.toordinal` (1 January 1 is day 1) but also
+    works for years before 1, which `datetime` cannot represent.
+    """
+    year -= month <= 2
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 305
+
+
+def _build_human_readable_date(start_date: tuple, end_date: tuple) -> str:
+    """
+    Return normal date from boundaries.
+    """
+    if start_date[1:3] == (1, 1) and end_date[1:3] == (12, 31):
+        if start_date[0] == end_date[0]:
+            return str(start_date[0])
+        else:
+            return f"{str(start_date[0])}–{str(end_date[0])}"
+    elif start_date[1:3] == (1, 1) and end_date[1:3] == (1, 1) and abs(end_date[0] - start_date[0]) == 10:
+        return f"circa {str(start_date[0]+5)}"  # FIXME: if date is exactly 10 years?
+    elif start_date == end_date:
+        return f"{str(start_date[2])}.{str(start_date[1])}.{str(start_date[0])}"  # TODO: prettify this
+    else:
+        return f"{str(start_date[2])}.{str(start_date[1])}.{str(start_date[0])}–{str(end_date[2])}.{str(end_date[1])}.{str(end_date[0])}"
+
+
+class AnnoDominiEnginePlayer:
+    """
+    Minimal player used by the engine on its own.
+
+    Attributes
+    ----------
+    cards : `list` of `AnnoDominiCard`
+        The player’s hand of cards
+    """
+    def __init__(self):
+        self.cards = []
+
+
+class AnnoDominiEngine:
+    """
+    The rules of Anno Domini, without any Discord I/O.
+
+    `AnnoDominiGame` builds on this class to run games in a channel;
+    on its own it can run seeded games with scripted players, e.g. for
+    benchmarking or replaying logged games.
+
+    Attributes
+    ----------
+    players : `list`
+        Players in the game. Anything with a `cards` list will do.
+    turn_order : `int`
+        Index of the player whose turn it is.
+    deck : `AnnoDominiDeck`
+        The shared deck the game's cards are drawn from.
+    topics : `list` of `str`
+        Topics the cards are drawn from.
+    cards : `list` of `int`
+        Deck indices of the cards in the stack.
+    board : `list` of `AnnoDominiCard`
+        The cards played to the game board.
+    board_errors : `int`
+        Number of cards on the board placed before a card they follow.
+    board_no : `int`
+        The number of boards played.
+    last_position : `int`
+        Board index of the last card played this round, or None.
+    rng : `random.Random`
+        Source of randomness for shuffling the stack.
+    recorder : `AnnoDominiGameRecorder`
+        Optional hook which is told about every move, e.g. to write it
+        to the move log.
+    placements : `list` of `tuple`
+        (card index, placed correctly) for each card played this round.
+    """
+    def __init__(self, rng: random.Random = None):
+        self.players = []
+        self.turn_order = 0
+        self.deck = None
+        self.topics = []
+        self.cards = []
+        self.board = []
+        self.board_errors = 0
+        self._descents = []
+        self.board_no = 0
+        self.last_position = None
+        self._bounds = None
+        self.rng = rng or random.Random()
+        self.recorder = None
+        self.placements = []
+
+    def fill_stack(self, deck, topics, size: int = None, weights=None):
+        """
+        Fills the stack with shuffled cards from the chosen topics.
+
+        If `size` is given, a balanced deck of about that many cards
+        spread out over time is used instead of every card, optionally
+        favouring cards by `weights` (one per card in the deck).
+        """
+        self.deck = deck
+        self.topics = topics
+        if size is None:
+            self.cards = deck.indices(topics)
+        else:
+            self.cards = deck.balanced(topics, size, self.rng, weights)
+        self.rng.shuffle(self.cards)
+        if self.recorder:
+            self.recorder.start(deck, topics, self.cards, len(self.players))
+
+    def _draw_card(self):
+        """
+        Takes the top card off the stack, refilling it first if it has
+        run out.
+
+        Raises
+        ------
+        `IndexError`
+            If every card of the topics is in play.
+        """
+        if not self.cards:
+            self.refill()
+        return self.deck[self.cards.pop()]
+
+    def refill(self):
+        """
+        Refills an empty stack with up to `REFILL_SIZE` shuffled cards
+        from the topics, leaving out the cards in hands and on the board.
+        """
+        in_play = {card.idx for card in self.board}
+        for player in self.players:
+            in_play.update(card.idx for card in player.cards)
+        rest = [idx for idx in self.deck.indices(self.topics) if idx not in in_play]
+        self.cards = self.rng.sample(rest, min(len(rest), REFILL_SIZE))
+        if self.recorder:
+            self.recorder.refill(self.cards)
+
+    def deal(self, player, count: int):
+        """
+        Deal up to `count` cards from the stack to a player.
+        """
+        for _ in range(count):
+            try:
+                player.cards.append(self._draw_card())
+            except IndexError:
+                return  # TODO: no cards left!
+
+    def deal_starting_hands(self, count: int):
+        """
+        Deal every player their starting hand.
+        """
+        for player in self.players:
+            self.deal(player, count)
+        if self.recorder:
+            self.recorder(EVENT_DEAL, count)
+
+    def newround(self):
+        """
+        Starts a new round with a single card on the board.
+        """
+        self.board_no += 1
+        self.board = [self._draw_card()]
+        self.board_errors = 0
+        self._descents = [False]
+        self.last_position = None
+        self._bounds = None
+        self.placements = []
+        if self.recorder:
+            self.recorder(EVENT_ROUND, self.board[0].idx)
+
+    def set_board(self, cards: list, last_position: int = None):
+        """
+        Replace the board, e.g. when restoring a game, and work out
+        its order state from scratch.
+        """
+        self.board = list(cards)
+        self._descents = [False] + [
+            card < previous for previous, card in zip(self.board, self.board[1:])
+        ]
+        self.board_errors = sum(self._descents)
+        self.last_position = last_position
+        self._bounds = None
+
+    def next_turn(self):
+        """
+        Pass the turn on to the next player.
+        """
+        self.turn_order += 1
+        if self.turn_order >= len(self.players):
+            self.turn_order = 0
+
+    def validate_move(self, move: tuple) -> bool:
+        """
+        Check whether a parsed move is allowed right now.
+
+        Moves must be one of:
+        * ("play", `int`, `int`)
+        * ("challenge",)
+        """
+        if move[0] == "challenge":
+            return len(self.board) >= 2
+        _, card, position = move
+        return (1 <= card <= len(self.players[self.turn_order].cards)
+                and position <= len(self.board))
+
+    def playcard(self, card: int, position: int):
+        """
+        Play a card to the game board.
+
+        Parameters
+        ----------
+        card : `int`
+            Card in player’s hand (1-indexed)
+        position : `int`
+            Location to play that card on board (0-indexed)
+        """
+        player = self.players[self.turn_order]
+        played = player.cards.pop(card-1)
+        self._insert_card(position, played)
+        if self.recorder:
+            self.recorder(EVENT_PLAY, self.turn_order, card, position, played.idx)
+
+    def _insert_card(self, position: int, card):
+        """
+        Insert a card into the board, keeping the order state up to date.
+
+        Only the neighbours of the new card can change, so the check is
+        O(1): the pair it splits up is dropped and the two new pairs
+        either side of it are compared.
+        """
+        correct = True
+        if position < len(self.board):
+            after = self.board[position]
+            self.board_errors -= self._descents[position]
+            self._descents[position] = after < card
+            self.board_errors += self._descents[position]
+            correct = not self._descents[position]
+        descent = position > 0 and card < self.board[position-1]
+        self._descents.insert(position, descent)
+        self.board.insert(position, card)
+        self.board_errors += descent
+        self.last_position = position
+        self._bounds = None
+        self.placements.append((card.idx, correct and not descent))
+
+    @property
+    def first_error(self):
+        """
+        Index of the first card on the board out of order, or None.
+        """
+        if not self.board_errors:
+            return None
+        return self._descents.index(True)
+
+    def valid_positions(self, card) -> range:
+        """
+        Board positions where a card can be played without being out of
+        order with any card already on the board.
+
+        A card is out of order after an earlier card if it ends before
+        that card starts, and before a later card if it starts after
+        that card ends. So a position is valid if the card ends after
+        every start to its left and starts before every end to its
+        right. Both running bounds only grow from left to right, which
+        makes the valid positions one contiguous range found by bisect.
+
+        Returns
+        -------
+        `range`
+            The valid positions (as in `playcard`), possibly empty.
+        """
+        if self._bounds is None:
+            self._bounds = (
+                list(itertools.accumulate(
+                    (card.start for card in self.board), max,
+                    initial=-math.inf)),
+                list(itertools.accumulate(
+                    (card.end for card in reversed(self.board)), min,
+                    initial=math.inf))[::-1]
+            )
+        max_starts, min_ends = self._bounds
+        first = bisect.bisect_right(min_ends, card.start)
+        last = bisect.bisect_left(max_starts, card.end) - 1
+        return range(first, last + 1)
+
+    def board_correct(self) -> bool:
+        """
+        Whether the cards on the board are in the correct order.
+        """
+        return not self.board_errors
+
+    def resolve_challenge(self) -> bool:
+        """
+        The current player challenges the order on the board.
+
+        The losing side is dealt their penalty cards. Starting the next
+        round is left to the caller.
+
+        Returns
+        -------
+        `bool`
+            True if the challenge was successful, i.e. the order was wrong.
+        """
+        successful = not self.board_correct()
+        if successful:
+            self.deal(self.players[self._get_previous_idx()], CHALLENGED_PENALTY)
+        else:
+            self.deal(self.players[self.turn_order], CHALLENGER_PENALTY)
+        if self.recorder:
+            self.recorder(EVENT_CHALLENGE, self.turn_order, successful)
+        return successful
+
+    def resolve_timeout(self):
+        """
+        The current player ran out of time: they are dealt a penalty
+        card and lose their turn.
+        """
+        self.deal(self.players[self.turn_order], TIMEOUT_PENALTY)
+        if self.recorder:
+            self.recorder(EVENT_TIMEOUT, self.turn_order)
+
+    def resolve_last_card(self):
+        """
+        Automatically challenges if the previous player has no cards left.
+
+        Returns
+        -------
+        `bool` or None
+            None if the previous player still has cards, True if they
+            have won and False if their last card was misplaced, in
+            which case they are dealt penalty cards.
+        """
+        previous = self._get_previous_idx()
+        player = self.players[previous]
+        if player.cards:
+            return None
+        win = self.board_correct()
+        if not win:
+            self.deal(player, CHALLENGED_PENALTY)
+        if self.recorder:
+            self.recorder(EVENT_LAST_CARD, previous, win)
+        return win
+
+    def _get_previous_idx(self):
+        """
+        Helper method to get the index of the previous player (when challenged).
+        """
+        return self.turn_order - 1 if self.turn_order > 0 else len(self.players) - 1
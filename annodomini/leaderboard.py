@@ -0,0 +1,106 @@
+import asyncio
+import bisect
+
+from redbot.core import Config
+
+
+class AnnoDominiLeaderboard:
+    """
+    Saves players' results and keeps each server's leaderboard sorted.
+
+    A finished game's results are written in a single transaction on
+    the server's member data. Each server's standings are read from
+    Config once, the first time they are needed, and from then on kept
+    in memory as a sorted list that every result updates with a
+    bisect, so showing the top players never reads Config again.
+    Results recorded while the standings are being read are applied
+    once they are in.
+
+    Attributes
+    ----------
+    config : `Config`
+        The cog's config.
+    """
+    def __init__(self, config: Config):
+        self.config = config
+        self._ranking = {}  # guild id -> sorted list of (-wins, games, member id)
+        self._keys = {}  # guild id -> {member id: key in the ranking}
+        self._locks = {}
+        self._pending = {}  # guild id -> totals recorded while loading
+
+    async def record(self, guild, results):
+        """
+        Save the results of a game.
+
+        Parameters
+        ----------
+        guild : `discord.Guild`
+            Server the game was played in.
+        results : `list` of `tuple`
+            (member id, won) for every human player.
+        """
+        if not results:
+            return
+        group = self.config._get_base_group(Config.MEMBER, str(guild.id))
+        totals = []
+        async with group.all() as members:
+            for member_id, won in results:
+                stats = members.setdefault(str(member_id), {})
+                stats["games"] = stats.get("games", 0) + 1
+                stats["wins"] = stats.get("wins", 0) + bool(won)
+                totals.append((member_id, stats["wins"], stats["games"]))
+        if guild.id in self._ranking:
+            for member_id, wins, games in totals:
+                self._update(guild.id, member_id, wins, games)
+        elif guild.id in self._pending:
+            # the standings are being read right now and may miss these
+            self._pending[guild.id].extend(totals)
+
+    async def top(self, guild, count: int = 10) -> list:
+        """
+        Returns (member id, wins, games) for the best players in a server.
+        """
+        await self._load(guild)
+        return [(member_id, -wins, games)
+                for wins, games, member_id in self._ranking[guild.id][:count]]
+
+    def discard(self, member_id: int):
+        """
+        Drop a member from every leaderboard.
+        """
+        for guild_id, keys in self._keys.items():
+            key = keys.pop(member_id, None)
+            if key is not None:
+                ranking = self._ranking[guild_id]
+                del ranking[bisect.bisect_left(ranking, key)]
+
+    async def _load(self, guild):
+        if guild.id in self._ranking:
+            return
+        lock = self._locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            if guild.id in self._ranking:
+                return  # loaded while we were waiting
+            self._pending[guild.id] = []
+            try:
+                members = await self.config.all_members(guild)
+            finally:
+                pending = self._pending.pop(guild.id)
+            keys = {
+                member_id: (-stats.get("wins", 0), stats.get("games", 0), member_id)
+                for member_id, stats in members.items()
+                if stats.get("games", 0)
+            }
+            self._keys[guild.id] = keys
+            self._ranking[guild.id] = sorted(keys.values())
+            for member_id, wins, games in pending:
+                self._update(guild.id, member_id, wins, games)
+
+    def _update(self, guild_id: int, member_id: int, wins: int, games: int):
+        ranking = self._ranking[guild_id]
+        keys = self._keys[guild_id]
+        old = keys.get(member_id)
+        if old is not None:
+            del ranking[bisect.bisect_left(ranking, old)]
+        keys[member_id] = (-wins, games, member_id)
+        bisect.insort(ranking, keys[member_id])
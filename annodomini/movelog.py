@@ -0,0 +1,288 @@
+import asyncio
+import datetime
+import logging
+import struct
+import threading
+import time
+
+from array import array
+from collections import deque
+from pathlib import Path
+
+EVENT_START = 1
+EVENT_DEAL = 2
+EVENT_ROUND = 3
+EVENT_PLAY = 4
+EVENT_CHALLENGE = 5
+EVENT_LAST_CARD = 6
+EVENT_TIMEOUT = 7
+EVENT_END = 8
+EVENT_LEAVE = 9
+EVENT_REFILL = 10
+
+LENGTH = struct.Struct("<I")
+HEADER = struct.Struct("<BdH")
+EVENTS = {
+    EVENT_START: struct.Struct("<qB"),
+    EVENT_DEAL: struct.Struct("<B"),
+    EVENT_ROUND: struct.Struct("<I"),
+    EVENT_PLAY: struct.Struct("<BBHI"),
+    EVENT_CHALLENGE: struct.Struct("<B?"),
+    EVENT_LAST_CARD: struct.Struct("<B?"),
+    EVENT_TIMEOUT: struct.Struct("<B"),
+    EVENT_END: struct.Struct("<B"),
+    EVENT_LEAVE: struct.Struct("<BBB"),
+    EVENT_REFILL: struct.Struct("<I"),
+}
+
+
+class MoveRecord:
+    """
+    One event read back from a move log.
+
+    Attributes
+    ----------
+    kind : `int`
+        One of the ``EVENT_*`` constants.
+    timestamp : `float`
+        When the event happened (seconds since the epoch).
+    gid : `int`
+        Id of the game.
+    values : `tuple`
+        The event's fixed-width fields.
+    language : `str`
+        Deck language (start events only).
+    topics : `list` of `str`
+        Topics of the deck (start events only).
+    stack : `array`
+        Deck indices of the shuffled stack (start events only).
+    """
+    __slots__ = ("kind", "timestamp", "gid", "values", "language", "topics", "stack")
+
+    def __init__(self, kind, timestamp, gid, values, language=None,
+                 topics=None, stack=None):
+        self.kind = kind
+        self.timestamp = timestamp
+        self.gid = gid
+        self.values = values
+        self.language = language
+        self.topics = topics
+        self.stack = stack
+
+
+def encode(kind: int, gid: int, values: tuple, extra: bytes = b"") -> bytes:
+    """
+    Encode an event as a length-prefixed record.
+    """
+    payload = HEADER.pack(kind, time.time(), gid) + EVENTS[kind].pack(*values) + extra
+    return LENGTH.pack(len(payload)) + payload
+
+
+def encode_start(gid: int, deck, topics, stack, players: int) -> bytes:
+    """
+    Encode the event opening a game, which holds the shuffled stack.
+    """
+    extra = [_pack_str(deck.language), LENGTH.pack(len(topics))]
+    extra.extend(_pack_str(topic) for topic in topics)
+    indices = array("I", stack)
+    extra.append(LENGTH.pack(len(indices)) + indices.tobytes())
+    return encode(EVENT_START, gid, (deck.mtime, players), b"".join(extra))
+
+
+def encode_refill(gid: int, stack) -> bytes:
+    """
+    Encode a refill of the stack, which holds the new stack.
+    """
+    indices = array("I", stack)
+    return encode(EVENT_REFILL, gid, (len(indices),), indices.tobytes())
+
+
+def iter_records(fp):
+    """
+    Stream the records of a move log from a binary file object.
+
+    A record cut short at the end of the file (e.g. by a crash during
+    a write) ends the stream.
+    """
+    while True:
+        prefix = fp.read(LENGTH.size)
+        if len(prefix) < LENGTH.size:
+            return
+        (length,) = LENGTH.unpack(prefix)
+        payload = fp.read(length)
+        if len(payload) < length:
+            return
+        yield decode(payload)
+
+
+def decode(payload: bytes) -> MoveRecord:
+    """
+    Decode the payload of one record.
+    """
+    kind, timestamp, gid = HEADER.unpack_from(payload)
+    offset = HEADER.size
+    values = EVENTS[kind].unpack_from(payload, offset)
+    record = MoveRecord(kind, timestamp, gid, values)
+    if kind == EVENT_START:
+        offset += EVENTS[kind].size
+        record.language, offset = _unpack_str(payload, offset)
+        (count,) = LENGTH.unpack_from(payload, offset)
+        offset += LENGTH.size
+        record.topics = []
+        for _ in range(count):
+            topic, offset = _unpack_str(payload, offset)
+            record.topics.append(topic)
+        (count,) = LENGTH.unpack_from(payload, offset)
+        offset += LENGTH.size
+        record.stack = array("I")
+        record.stack.frombytes(payload[offset:offset + count * 4])
+    elif kind == EVENT_REFILL:
+        offset += EVENTS[kind].size
+        record.stack = array("I")
+        record.stack.frombytes(payload[offset:offset + values[0] * 4])
+    return record
+
+
+def _pack_str(value: str) -> bytes:
+    data = value.encode("utf8")
+    return LENGTH.pack(len(data)) + data
+
+
+def _unpack_str(payload: bytes, offset: int):
+    (length,) = LENGTH.unpack_from(payload, offset)
+    offset += LENGTH.size
+    return payload[offset:offset + length].decode("utf8"), offset + length
+
+
+class AnnoDominiGameRecorder:
+    """
+    Records the events of one game into the cog's move log.
+
+    The engine calls the recorder with an event and its fields.
+    """
+    def __init__(self, movelog, gid: int):
+        self.movelog = movelog
+        self.gid = gid
+
+    def __call__(self, kind: int, *values):
+        self.movelog.append(encode(kind, self.gid, values))
+
+    def start(self, deck, topics, stack, players: int):
+        """
+        Record the start of a game.
+        """
+        self.movelog.append(encode_start(self.gid, deck, topics, stack, players))
+
+    def refill(self, stack):
+        """
+        Record the stack being refilled.
+        """
+        self.movelog.append(encode_refill(self.gid, stack))
+
+
+class AnnoDominiMoveLog:
+    """
+    Append-only binary log of every game event, one file per day.
+
+    Records are buffered in memory and written out in the default
+    executor every `interval` seconds, or sooner once the buffer grows
+    past `max_buffer` bytes, so logging adds no I/O to a move.
+
+    Attributes
+    ----------
+    path : `Path`
+        Folder holding the ``YYYY-MM-DD.bin`` log files.
+    """
+    def __init__(self, path: Path, interval: float = 5.0,
+                 max_buffer: int = 64 * 1024):
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.interval = interval
+        self.max_buffer = max_buffer
+        self.log = logging.getLogger('red.redarmycogs.annodomini')
+        self._buffer = {}
+        self._size = 0
+        self._task = None
+        self._pending = deque()  # taken buffers, oldest first
+        self._writer = None
+        self._file_lock = threading.Lock()
+
+    def recorder(self, gid: int) -> AnnoDominiGameRecorder:
+        """
+        Returns a recorder for a game.
+        """
+        return AnnoDominiGameRecorder(self, gid)
+
+    def append(self, record: bytes):
+        """
+        Queue a record to be written.
+        """
+        day = datetime.date.today().isoformat()
+        self._buffer.setdefault(day, []).append(record)
+        self._size += len(record)
+        if self._size >= self.max_buffer:
+            self._queue(self._take())
+        elif self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._write_later())
+
+    async def flush(self):
+        """
+        Write out everything buffered so far.
+        """
+        self._queue(self._take())
+        if self._writer is not None and not self._writer.done():
+            await asyncio.shield(self._writer)
+
+    def close(self):
+        """
+        Write out the buffer synchronously, e.g. when the cog unloads.
+
+        Waits for a write already running in the executor to finish
+        first, so the file still gets every record in order.
+        """
+        if self._task is not None:
+            self._task.cancel()
+        if self._writer is not None:
+            self._writer.cancel()
+        buffer = self._take()
+        if buffer:
+            self._pending.append(buffer)
+        while self._pending:
+            self._write_next()
+
+    def _take(self) -> dict:
+        buffer, self._buffer, self._size = self._buffer, {}, 0
+        return buffer
+
+    def _queue(self, buffer: dict):
+        """
+        Hand a taken buffer to the writer, which writes buffers one at
+        a time in the order they were taken.
+        """
+        if not buffer:
+            return
+        self._pending.append(buffer)
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._drain())
+
+    async def _write_later(self):
+        await asyncio.sleep(self.interval)
+        self._queue(self._take())
+
+    async def _drain(self):
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            try:
+                await loop.run_in_executor(None, self._write_next)
+            except OSError:
+                self.log.exception('Could not write Anno Domini move log.')
+
+    def _write_next(self):
+        # The oldest buffer is only taken off the queue once the file
+        # is ours, so whichever thread gets here first writes it.
+        with self._file_lock:
+            if not self._pending:
+                return
+            for day, records in self._pending.popleft().items():
+                with open(Path.joinpath(self.path, f"{day}.bin"), "ab") as fp:
+                    fp.write(b"".join(records))
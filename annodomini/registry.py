@@ -0,0 +1,173 @@
+import random
+
+from collections import deque
+from typing import Optional
+
+from .annodominigame import AnnoDominiGame, TooManyGamesException
+
+
+class AnnoDominiRegistry:
+    """
+    Keeps track of the games run by the cog.
+
+    Games are indexed by game id, by channel and by the Discord id of
+    each player so the lookups every command starts with are O(1)
+    however many games are live. A game played in its own thread is
+    indexed by the thread, and games still waiting for players are
+    also listed under the channel the thread belongs to, so they can
+    be joined from there. Game ids come from a pre-shuffled pool, so
+    handing one out never needs a retry.
+
+    Parameters
+    ----------
+    first_id : `int`
+        Lowest game id handed out.
+    last_id : `int`
+        Highest game id handed out.
+    """
+    def __init__(self, first_id: int = 1000, last_id: int = 9999):
+        free_ids = list(range(first_id, last_id + 1))
+        random.shuffle(free_ids)
+        self._free_ids = deque(free_ids)
+        self._by_gid = {}
+        self._by_channel = {}
+        self._by_member = {}
+        self._open = {}
+
+    def __iter__(self):
+        return iter(list(self._by_gid.values()))
+
+    def __len__(self):
+        return len(self._by_gid)
+
+    def __contains__(self, game):
+        return self._by_gid.get(game.gid) is game
+
+    def allocate_id(self) -> int:
+        """
+        Returns an unused game id.
+
+        Raises
+        ------
+        `TooManyGamesException`
+            If every id is in use.
+        """
+        try:
+            return self._free_ids.popleft()
+        except IndexError:
+            raise TooManyGamesException("Games full!")
+
+    def reserve_ids(self, gids):
+        """
+        Take ids out of the pool, e.g. for games restored after a reload.
+        """
+        gids = set(gids)
+        self._free_ids = deque(gid for gid in self._free_ids if gid not in gids)
+
+    def release_id(self, gid: int):
+        """
+        Put an id back in the pool.
+        """
+        self._free_ids.append(gid)
+
+    def add(self, game):
+        """
+        Register a game and any players already in it.
+        """
+        self._by_gid[game.gid] = game
+        self._by_channel.setdefault(game.channel.id, []).append(game)
+        for player in game.players:
+            if not player.bot:
+                self._by_member[player.member.id] = game
+        if not game.live:
+            for channel_id in self._lobby_ids(game.channel):
+                self._open.setdefault(channel_id, {})[game.gid] = game
+
+    def remove(self, game):
+        """
+        Forget a game and its players and free up its id.
+
+        Removing a game that is not registered does nothing.
+        """
+        if self._by_gid.get(game.gid) is not game:
+            return
+        del self._by_gid[game.gid]
+        self.release_id(game.gid)
+        channel_games = self._by_channel.get(game.channel.id, [])
+        if game in channel_games:
+            channel_games.remove(game)
+        if not channel_games:
+            self._by_channel.pop(game.channel.id, None)
+        for player in game.players:
+            if self._by_member.get(player.member.id) is game:
+                del self._by_member[player.member.id]
+        self.close_lobby(game)
+
+    def close_lobby(self, game):
+        """
+        Stop listing a game as open to join, e.g. once it has started.
+        """
+        for channel_id in self._lobby_ids(game.channel):
+            lobby = self._open.get(channel_id)
+            if lobby is not None and lobby.get(game.gid) is game:
+                del lobby[game.gid]
+                if not lobby:
+                    del self._open[channel_id]
+
+    def add_player(self, game, player):
+        """
+        Add a player to a game.
+        """
+        game.players.append(player)
+        if game in self and not player.bot:
+            self._by_member[player.member.id] = game
+
+    def remove_player(self, game, player):
+        """
+        Remove a player from a game.
+        """
+        game.players.remove(player)
+        if self._by_member.get(player.member.id) is game:
+            del self._by_member[player.member.id]
+
+    def get(self, gid: int) -> Optional[AnnoDominiGame]:
+        """
+        Returns the game with this id or None.
+        """
+        return self._by_gid.get(gid)
+
+    def by_channel(self, channel) -> Optional[AnnoDominiGame]:
+        """
+        Returns the first game in this channel or None.
+        """
+        channel_games = self._by_channel.get(channel.id)
+        if channel_games:
+            return channel_games[0]
+        return None
+
+    def open_game(self, channel) -> Optional[AnnoDominiGame]:
+        """
+        Returns the oldest game waiting for players in this channel
+        (or one of its threads), or None.
+        """
+        lobby = self._open.get(channel.id)
+        if lobby:
+            return next(iter(lobby.values()))
+        return None
+
+    def by_member(self, member) -> Optional[AnnoDominiGame]:
+        """
+        Returns the game a member is playing in or None.
+        """
+        return self._by_member.get(member.id)
+
+    @staticmethod
+    def _lobby_ids(channel) -> tuple:
+        """
+        Returns the ids a waiting game is listed under: its channel and,
+        for a thread, the channel the thread belongs to.
+        """
+        parent_id = getattr(channel, "parent_id", None)
+        if parent_id is None:
+            return (channel.id,)
+        return (channel.id, parent_id)
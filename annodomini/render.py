@@ -0,0 +1,130 @@
+import asyncio
+import json
+import logging
+import time
+
+from collections import deque
+
+import discord
+
+
+class AnnoDominiRenderer:
+    """
+    Sends the embeds for boards and hands with as few API calls as possible.
+
+    Each message's last sent embed is remembered by a content digest, so
+    an edit which would not change anything visible is skipped. The
+    first edit to a message goes out straight away; further edits within
+    `window` seconds are coalesced and only the latest is sent once the
+    window has passed.
+
+    Direct messages go through `dm_slots`, so only a few are in flight
+    at once however many hands are being sent, and how long the last
+    thousand took is kept in `dm_latencies` for ``annodomini stats dms``.
+
+    Parameters
+    ----------
+    window : `float`
+        Minimum time (in seconds) between two edits to the same message.
+    dm_concurrency : `int`
+        Maximum number of direct messages sent at the same time.
+    """
+    def __init__(self, window: float = 1.0, dm_concurrency: int = 10):
+        self.window = window
+        self.dm_slots = asyncio.Semaphore(dm_concurrency)
+        self.dm_latencies = deque(maxlen=1000)
+        self.log = logging.getLogger('red.redarmycogs.annodomini')
+        self._sent = {}  # message id -> (digest, time of last edit)
+        self._pending = {}  # message id -> (message, embed, digest)
+        self._tasks = {}
+        self._released = set()
+
+    @staticmethod
+    def digest(embed: discord.Embed) -> int:
+        """
+        Returns a hash of everything visible in an embed.
+        """
+        return hash(json.dumps(embed.to_dict(), sort_keys=True, default=str))
+
+    async def send(self, messageable, embed: discord.Embed) -> discord.Message:
+        """
+        Send a new message with an embed and start tracking it.
+        """
+        message = await messageable.send(embed=embed)
+        self._sent[message.id] = (self.digest(embed), time.monotonic())
+        return message
+
+    async def edit(self, message: discord.Message, embed: discord.Embed,
+                   now: bool = False):
+        """
+        Update a message's embed.
+
+        Parameters
+        ----------
+        message : `discord.Message`
+            Message to update.
+        embed : `discord.Embed`
+            The new embed.
+        now : `bool`
+            Send the edit (and any queued one) without waiting for the
+            window to pass.
+        """
+        key = message.id
+        digest = self.digest(embed)
+        if key in self._tasks:
+            self._pending[key] = (message, embed, digest)
+            if now:
+                await self.flush(message)
+            return
+        last = self._sent.get(key)
+        if last is not None and last[0] == digest:
+            return
+        wait = 0 if last is None else self.window - (time.monotonic() - last[1])
+        if now or wait <= 0:
+            await self._edit(message, embed, digest)
+            return
+        self._pending[key] = (message, embed, digest)
+        self._tasks[key] = asyncio.create_task(self._flush_later(key, wait))
+
+    async def flush(self, message: discord.Message):
+        """
+        Send a queued edit for a message immediately.
+        """
+        task = self._tasks.pop(message.id, None)
+        if task is not None:
+            task.cancel()
+        await self._flush(message.id)
+
+    def release(self, message: discord.Message):
+        """
+        Stop tracking a message once any queued edit has been sent.
+        """
+        if message is None:
+            return
+        if message.id in self._tasks:
+            self._released.add(message.id)
+        else:
+            self._sent.pop(message.id, None)
+
+    async def _flush_later(self, key: int, wait: float):
+        await asyncio.sleep(wait)
+        del self._tasks[key]
+        try:
+            await self._flush(key)
+        except discord.HTTPException:
+            self.log.exception('Failed to update Anno Domini message.')
+
+    async def _flush(self, key: int):
+        pending = self._pending.pop(key, None)
+        if pending is not None:
+            message, embed, digest = pending
+            if self._sent.get(key, (None,))[0] != digest:
+                await self._edit(message, embed, digest)
+        if key in self._released:
+            self._released.discard(key)
+            self._sent.pop(key, None)
+
+    async def _edit(self, message: discord.Message, embed: discord.Embed,
+                    digest: int):
+        self._sent[message.id] = (digest, time.monotonic())
+        await message.edit(embed=embed)
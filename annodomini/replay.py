@@ -0,0 +1,210 @@
+"""
+Replay Anno Domini games from the cog's move log.
+
+Every game in the log is rebuilt move by move on the headless rules
+engine, checking that each card drawn and each challenge comes out
+the same as it did in the game. Run it with::
+
+    python -m annodomini.replay movelog/2024-01-31.bin --data annodomini/data
+"""
+import argparse
+import datetime
+import sys
+
+from collections import deque
+from pathlib import Path
+
+from .deck import AnnoDominiDeckStore
+from .engine import AnnoDominiEngine, AnnoDominiEnginePlayer
+from .movelog import (
+    EVENT_CHALLENGE,
+    EVENT_DEAL,
+    EVENT_END,
+    EVENT_LAST_CARD,
+    EVENT_LEAVE,
+    EVENT_PLAY,
+    EVENT_REFILL,
+    EVENT_ROUND,
+    EVENT_START,
+    EVENT_TIMEOUT,
+    iter_records
+)
+
+
+class ReplayedEngine(AnnoDominiEngine):
+    """
+    Engine that refills its stack with the cards the log says it got.
+
+    A refill is logged while a card is being drawn, so it comes just
+    before the event that drew the card.
+
+    Attributes
+    ----------
+    refills : `deque`
+        Logged stacks not yet used, oldest first.
+    """
+    def __init__(self):
+        super().__init__()
+        self.refills = deque()
+
+    def refill(self):
+        self.cards = list(self.refills.popleft()) if self.refills else []
+
+
+class ReplayedGame:
+    """
+    A game being rebuilt from the move log.
+
+    Attributes
+    ----------
+    gid : `int`
+        Game id.
+    started : `float`
+        When the game started (seconds since the epoch).
+    engine : `AnnoDominiEngine`
+        Engine the moves are applied to.
+    turns : `int`
+        Number of cards played.
+    challenges : `int`
+        Number of challenges.
+    timeouts : `int`
+        Number of turns players let run out.
+    winner : `int`
+        Index of the winning player, or None.
+    errors : `list` of `str`
+        Places where the replay differed from the log.
+    """
+    def __init__(self, gid: int, started: float, engine: AnnoDominiEngine):
+        self.gid = gid
+        self.started = started
+        self.engine = engine
+        self.turns = 0
+        self.challenges = 0
+        self.timeouts = 0
+        self.winner = None
+        self.errors = []
+
+    def check(self, what: str, logged, replayed):
+        if logged != replayed:
+            self.errors.append(f"{what}: logged {logged}, replayed {replayed}")
+
+    def apply(self, record):
+        """
+        Apply one event to the engine.
+        """
+        engine = self.engine
+        kind, values = record.kind, record.values
+        if kind == EVENT_DEAL:
+            engine.deal_starting_hands(values[0])
+        elif kind == EVENT_ROUND:
+            engine.newround()
+            self.check("new round", values[0], engine.board[0].idx)
+        elif kind == EVENT_PLAY:
+            engine.turn_order, card, position, idx = values
+            self.check(f"turn {self.turns + 1}",
+                       idx, engine.players[engine.turn_order].cards[card-1].idx)
+            engine.playcard(card, position)
+            self.turns += 1
+        elif kind == EVENT_CHALLENGE:
+            engine.turn_order, successful = values
+            self.check(f"challenge {self.challenges + 1}",
+                       successful, engine.resolve_challenge())
+            self.challenges += 1
+        elif kind == EVENT_LAST_CARD:
+            previous, win = values
+            engine.turn_order = (previous + 1) % len(engine.players)
+            self.check("last card", win, engine.resolve_last_card())
+            if win:
+                self.winner = previous
+        elif kind == EVENT_TIMEOUT:
+            engine.turn_order = values[0]
+            engine.resolve_timeout()
+            self.timeouts += 1
+        elif kind == EVENT_LEAVE:
+            # `promoted` only says who became the owner; seats don't move
+            idx, _, engine.turn_order = values
+            del engine.players[idx]
+        elif kind == EVENT_REFILL:
+            engine.refills.append(record.stack)
+        elif kind == EVENT_END:
+            self.winner = None if values[0] == 255 else values[0]
+
+    def summary(self) -> str:
+        started = datetime.datetime.fromtimestamp(self.started)
+        winner = "none" if self.winner is None else f"player {self.winner + 1}"
+        status = "ok" if not self.errors else f"{len(self.errors)} mismatches"
+        return (f"#{self.gid} {started:%Y-%m-%d %H:%M:%S}  "
+                f"players: {len(self.engine.players)}  turns: {self.turns}  "
+                f"challenges: {self.challenges}  timeouts: {self.timeouts}  "
+                f"winner: {winner}  {status}")
+
+
+def replay(logfile: Path, decks: AnnoDominiDeckStore, verbose: bool = False) -> int:
+    """
+    Replay every game in a move log and print a summary of each.
+
+    Returns the number of games whose replay did not match the log.
+    """
+    loaded = {}
+    games = {}
+    finished = []
+    with open(logfile, "rb") as fp:
+        for record in iter_records(fp):
+            if record.kind == EVENT_START:
+                deck = loaded.get(record.language)
+                if deck is None:
+                    sourcefile = decks.sourcefile(record.language)
+                    deck = decks._load(record.language, sourcefile,
+                                       sourcefile.stat().st_mtime_ns)
+                    loaded[record.language] = deck
+                if deck.mtime != record.values[0]:
+                    print(f"warning: deck {record.language} has changed since "
+                          f"game #{record.gid} was played", file=sys.stderr)
+                engine = ReplayedEngine()
+                engine.players = [
+                    AnnoDominiEnginePlayer() for _ in range(record.values[1])]
+                engine.deck = deck
+                engine.topics = record.topics
+                engine.cards = list(record.stack)
+                if record.gid in games:
+                    finished.append(games[record.gid])
+                games[record.gid] = ReplayedGame(record.gid, record.timestamp, engine)
+                continue
+            game = games.get(record.gid)
+            if game is None:
+                continue  # started in an earlier log file
+            try:
+                game.apply(record)
+            except (IndexError, ValueError) as exc:
+                game.errors.append(f"could not apply event {record.kind}: {exc!r}")
+            if record.kind == EVENT_END:
+                finished.append(games.pop(record.gid))
+    finished.extend(games.values())
+
+    mismatched = 0
+    for game in sorted(finished, key=lambda game: game.started):
+        print(game.summary())
+        if game.errors:
+            mismatched += 1
+            if verbose:
+                for error in game.errors:
+                    print(f"    {error}")
+    return mismatched
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Replay Anno Domini games from a move log.")
+    parser.add_argument("logfile", type=Path)
+    parser.add_argument("--data", type=Path,
+                        default=Path(__file__).parent / "data",
+                        help="folder holding the data-{language}.csv files")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="list every mismatch")
+    args = parser.parse_args(argv)
+    if replay(args.logfile, AnnoDominiDeckStore(args.data), args.verbose):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
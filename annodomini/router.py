@@ -0,0 +1,99 @@
+import asyncio
+import re
+
+from typing import Optional
+
+MOVE_PATTERN = re.compile(r"(?P<chal>challenge)|play (?P<card>\d+)( (?P<pos>\d+))?")
+
+
+def parse_move(content: str) -> Optional[tuple]:
+    """
+    Parse a message into a move.
+
+    Returns
+    -------
+    `tuple`
+        Either ``("challenge",)`` or ``("play", card, position)``, or
+        None if the message is not a move.
+    """
+    match = MOVE_PATTERN.match(content.lower())
+    if not match:
+        return None
+    if match.group("chal"):
+        return ("challenge",)
+    return ("play", int(match.group("card")), int(match.group("pos") or 0))
+
+
+class AnnoDominiTurnRouter:
+    """
+    Routes channel messages to the game waiting for that author's move.
+
+    The cog has a single `on_message` listener which hands every
+    message to `dispatch`. A dict lookup on (channel id, author id)
+    finds the one game waiting for that person, so the cost per
+    message stays flat however many games are running.
+    """
+    def __init__(self):
+        self._waiting = {}
+
+    def __len__(self):
+        return len(self._waiting)
+
+    def expect(self, game, channel, member) -> asyncio.Future:
+        """
+        Register a game as waiting for a member's move in a channel.
+
+        Returns
+        -------
+        `asyncio.Future`
+            Resolved with the parsed move once a valid one arrives.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[(channel.id, member.id)] = (game, future)
+        return future
+
+    def discard(self, channel, member, future: asyncio.Future):
+        """
+        Stop waiting for a member's move, if still waiting on `future`.
+        """
+        key = (channel.id, member.id)
+        entry = self._waiting.get(key)
+        if entry is not None and entry[1] is future:
+            del self._waiting[key]
+
+    def withdraw(self, channel, member) -> bool:
+        """
+        Resolve a member's pending move as ``("left",)``, e.g. when they
+        leave the game on their own turn.
+
+        Returns
+        -------
+        `bool`
+            True if a move was pending.
+        """
+        entry = self._waiting.pop((channel.id, member.id), None)
+        if entry is None or entry[1].done():
+            return False
+        entry[1].set_result(("left",))
+        return True
+
+    def dispatch(self, message) -> bool:
+        """
+        Hand a message to the game waiting for it.
+
+        Returns
+        -------
+        `bool`
+            True if the message was a valid move for a waiting game.
+        """
+        entry = self._waiting.get((message.channel.id, message.author.id))
+        if entry is None:
+            return False
+        game, future = entry
+        if future.done():
+            return False
+        move = parse_move(message.content)
+        if move is None or not game.validate_move(move):
+            return False
+        future.set_result(move)
+        return True
@@ -0,0 +1,303 @@
+import asyncio
+import logging
+import os
+import struct
+
+from array import array
+from pathlib import Path
+
+MAGIC = b"ADS1"
+HEADER = struct.Struct("<4sHQQQIBBhq")
+PLAYER = struct.Struct("<?QQ?")
+BOT = struct.Struct("<dd")
+LENGTH = struct.Struct("<I")
+
+
+class AnnoDominiPlayerSnapshot:
+    """
+    Saved state of one player.
+
+    Attributes
+    ----------
+    bot : `bool`
+        Whether the player is a computer player.
+    member_id : `int`
+        Discord id of the player (0 for bots).
+    message_id : `int`
+        Id of the DM holding the player’s hand (0 if none).
+    owner : `bool`
+        Whether the player created the game.
+    name : `str`
+        Name of a computer player.
+    noise : `float`
+        Knowledge noise (in years) of a computer player.
+    caution : `float`
+        Challenge threshold of a computer player.
+    hand : `array`
+        Deck indices of the cards in the player’s hand.
+    """
+    def __init__(self, bot, member_id, message_id, owner, name="",
+                 noise=0.0, caution=0.0, hand=()):
+        self.bot = bot
+        self.member_id = member_id
+        self.message_id = message_id
+        self.owner = owner
+        self.name = name
+        self.noise = noise
+        self.caution = caution
+        self.hand = hand
+
+
+class AnnoDominiSnapshot:
+    """
+    Saved state of a live game, taken at the start of a turn.
+
+    Cards are stored as indices into the deck, so a snapshot can only
+    be restored against the same version of the deck (see `mtime`).
+
+    Attributes
+    ----------
+    gid : `int`
+        Game id.
+    guild_id : `int`
+        Id of the server the game is played in.
+    channel_id : `int`
+        Id of the channel the game is played in.
+    board_message_id : `int`
+        Id of the message showing the board (0 if none).
+    board_no : `int`
+        The number of boards played.
+    turn_order : `int`
+        Index of the player whose turn it is.
+    idle_turns : `int`
+        Number of turns in a row players have timed out.
+    last_position : `int`
+        Board index of the last card played this round, or None.
+    mtime : `int`
+        Modification time of the deck's source file.
+    language : `str`
+        Language of the deck.
+    topics : `list` of `str`
+        Topics the cards are drawn from.
+    stack : `array`
+        Deck indices of the cards in the stack.
+    board : `array`
+        Deck indices of the cards on the board.
+    players : `list` of `AnnoDominiPlayerSnapshot`
+        The players, in turn order.
+    """
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+
+def dump(game) -> bytes:
+    """
+    Serialise a game into a compact snapshot.
+    """
+    parts = [HEADER.pack(
+        MAGIC, game.gid, game.guild.id, game.channel.id,
+        _message_id(game.board_embed), game.board_no, game.turn_order,
+        game._idle_turns,
+        -1 if game.last_position is None else game.last_position,
+        game.deck.mtime
+    )]
+    parts.append(_pack_str(game.deck.language))
+    parts.append(_pack_strs(game.topics))
+    parts.append(_pack_indices(game.cards))
+    parts.append(_pack_indices(card.idx for card in game.board))
+    parts.append(LENGTH.pack(len(game.players)))
+    for player in game.players:
+        parts.append(PLAYER.pack(
+            player.bot, player.member.id or 0,
+            _message_id(player.card_embed), player.owner))
+        if player.bot:
+            parts.append(_pack_str(player.member.name))
+            parts.append(BOT.pack(player.ai.noise / 365.25, player.ai.caution))
+        parts.append(_pack_indices(card.idx for card in player.cards))
+    return b"".join(parts)
+
+
+def load(data: bytes) -> AnnoDominiSnapshot:
+    """
+    Read a snapshot written by `dump`.
+
+    Raises
+    ------
+    `ValueError`
+        If the data is not a valid snapshot.
+    """
+    view = memoryview(data)
+    try:
+        (magic, gid, guild_id, channel_id, board_message_id, board_no,
+         turn_order, idle_turns, last_position, mtime) = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError("Not an Anno Domini snapshot.")
+        offset = HEADER.size
+        language, offset = _unpack_str(view, offset)
+        topics, offset = _unpack_strs(view, offset)
+        stack, offset = _unpack_indices(view, offset)
+        board, offset = _unpack_indices(view, offset)
+        (count,) = LENGTH.unpack_from(view, offset)
+        offset += LENGTH.size
+        players = []
+        for _ in range(count):
+            bot, member_id, message_id, owner = PLAYER.unpack_from(view, offset)
+            offset += PLAYER.size
+            name, noise, caution = "", 0.0, 0.0
+            if bot:
+                name, offset = _unpack_str(view, offset)
+                noise, caution = BOT.unpack_from(view, offset)
+                offset += BOT.size
+            hand, offset = _unpack_indices(view, offset)
+            players.append(AnnoDominiPlayerSnapshot(
+                bot, member_id, message_id, owner, name, noise, caution, hand))
+    except struct.error as exc:
+        raise ValueError("Truncated Anno Domini snapshot.") from exc
+    return AnnoDominiSnapshot(
+        gid=gid, guild_id=guild_id, channel_id=channel_id,
+        board_message_id=board_message_id, board_no=board_no,
+        turn_order=turn_order, idle_turns=idle_turns,
+        last_position=None if last_position < 0 else last_position,
+        mtime=mtime, language=language, topics=topics, stack=stack,
+        board=board, players=players
+    )
+
+
+def _message_id(message) -> int:
+    return message.id if message is not None else 0
+
+
+def _pack_str(value: str) -> bytes:
+    data = value.encode("utf8")
+    return LENGTH.pack(len(data)) + data
+
+
+def _pack_strs(values) -> bytes:
+    values = list(values)
+    return LENGTH.pack(len(values)) + b"".join(_pack_str(v) for v in values)
+
+
+def _pack_indices(indices) -> bytes:
+    data = array("I", indices)
+    return LENGTH.pack(len(data)) + data.tobytes()
+
+
+def _unpack_str(view: memoryview, offset: int):
+    (length,) = LENGTH.unpack_from(view, offset)
+    offset += LENGTH.size
+    if offset + length > len(view):
+        raise struct.error("string runs past the end of the snapshot")
+    return str(view[offset:offset+length], "utf8"), offset + length
+
+
+def _unpack_strs(view: memoryview, offset: int):
+    (count,) = LENGTH.unpack_from(view, offset)
+    offset += LENGTH.size
+    values = []
+    for _ in range(count):
+        value, offset = _unpack_str(view, offset)
+        values.append(value)
+    return values, offset
+
+
+def _unpack_indices(view: memoryview, offset: int):
+    (count,) = LENGTH.unpack_from(view, offset)
+    offset += LENGTH.size
+    end = offset + count * 4
+    if end > len(view):
+        raise struct.error("indices run past the end of the snapshot")
+    indices = array("I")
+    indices.frombytes(view[offset:end])
+    return indices, end
+
+
+class AnnoDominiSnapshotStore:
+    """
+    Keeps one snapshot file per live game so games survive cog reloads.
+
+    Files are written and read in the default executor, and written to
+    a temporary file first so a crash never leaves half a snapshot.
+    Saves and deletes of the same game run one at a time in the order
+    they were called, so a delete can't be overtaken by a save that
+    was still being written.
+
+    Attributes
+    ----------
+    path : `Path`
+        Folder holding the snapshot files.
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.log = logging.getLogger('red.redarmycogs.annodomini')
+        self._last = {}  # gid -> latest file operation
+
+    async def save(self, game):
+        """
+        Write a snapshot of a game.
+        """
+        await self._queue(game.gid, self._write, dump(game))
+
+    async def delete(self, gid: int):
+        """
+        Remove a game's snapshot, if there is one.
+        """
+        await self._queue(gid, self._delete)
+
+    async def _queue(self, gid: int, func, *args):
+        """
+        Run a file operation for a game once its previous one is done.
+
+        The operation runs in its own task, so it still finishes (and
+        still holds up the next one) if the caller is cancelled.
+        """
+        previous = self._last.get(gid)
+        loop = asyncio.get_running_loop()
+
+        async def run():
+            if previous is not None:
+                await asyncio.wait([previous])
+            await loop.run_in_executor(None, func, gid, *args)
+
+        task = asyncio.create_task(run())
+        self._last[gid] = task
+
+        def forget(task):
+            if self._last.get(gid) is task:
+                del self._last[gid]
+
+        task.add_done_callback(forget)
+        await asyncio.shield(task)
+
+    async def load_all(self) -> list:
+        """
+        Read every snapshot in one batch, skipping any that are corrupt.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._read_all)
+
+    def _file(self, gid: int) -> Path:
+        return Path.joinpath(self.path, f"{gid}.snap")
+
+    def _write(self, gid: int, data: bytes):
+        tmp = Path.joinpath(self.path, f"{gid}.snap.tmp")
+        with open(tmp, "wb") as fp:
+            fp.write(data)
+        os.replace(tmp, self._file(gid))
+
+    def _delete(self, gid: int):
+        try:
+            self._file(gid).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _read_all(self) -> list:
+        snapshots = []
+        for file in self.path.glob("*.snap"):
+            try:
+                snapshots.append(load(file.read_bytes()))
+            except (OSError, ValueError):
+                self.log.exception(f"Could not read snapshot {file.name}.")
+                file.unlink(missing_ok=True)
+        return snapshots
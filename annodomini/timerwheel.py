@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import math
+import time
+
+
+class TimerHandle:
+    """
+    A callback scheduled on a `TimerWheel`.
+
+    Attributes
+    ----------
+    callback : `callable`
+        Called without arguments when the timer fires.
+    slot : `int`
+        Slot of the wheel the timer sits in.
+    rounds : `int`
+        Full turns of the wheel left before the timer fires.
+    """
+    __slots__ = ("callback", "slot", "rounds")
+
+    def __init__(self, callback, slot: int, rounds: int):
+        self.callback = callback
+        self.slot = slot
+        self.rounds = rounds
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel running every deadline on a single task.
+
+    Timers are dropped into one of `slots` buckets according to when
+    they are due. A single task ticks through the buckets once every
+    `resolution` seconds and fires whatever is due, so scheduling or
+    cancelling a timer is O(1) and thousands of deadlines cost one
+    task instead of one asyncio timeout each.
+
+    Parameters
+    ----------
+    resolution : `float`
+        Length of a tick in seconds; timers fire up to one tick late.
+    slots : `int`
+        Number of buckets in the wheel.
+    """
+    def __init__(self, resolution: float = 1.0, slots: int = 512):
+        self.resolution = resolution
+        self.log = logging.getLogger('red.redarmycogs.annodomini')
+        self._slots = [set() for _ in range(slots)]
+        self._tick = 0
+        self._started = None
+        self._task = None
+
+    def __len__(self):
+        return sum(len(slot) for slot in self._slots)
+
+    def schedule(self, delay: float, callback) -> TimerHandle:
+        """
+        Call `callback` after `delay` seconds.
+        """
+        if self._task is None:
+            self._started = time.monotonic()
+            self._tick = 0
+            self._task = asyncio.create_task(self._run())
+        ticks = max(1, math.ceil(delay / self.resolution))
+        rounds, offset = divmod(ticks, len(self._slots))
+        if offset == 0:
+            rounds, offset = rounds - 1, len(self._slots)
+        slot = (self._tick + offset) % len(self._slots)
+        handle = TimerHandle(callback, slot, rounds)
+        self._slots[slot].add(handle)
+        return handle
+
+    def cancel(self, handle: TimerHandle):
+        """
+        Stop a timer from firing. Cancelling twice does nothing.
+        """
+        if handle is not None:
+            self._slots[handle.slot].discard(handle)
+
+    def stop(self):
+        """
+        Stop the wheel and drop every timer.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for slot in self._slots:
+            slot.clear()
+
+    async def _run(self):
+        while True:
+            next_tick = self._started + (self._tick + 1) * self.resolution
+            await asyncio.sleep(max(0, next_tick - time.monotonic()))
+            self._tick += 1
+            slot = self._slots[self._tick % len(self._slots)]
+            due = [handle for handle in slot if handle.rounds == 0]
+            for handle in slot:
+                handle.rounds -= 1
+            for handle in due:
+                slot.discard(handle)
+                try:
+                    handle.callback()
+                except Exception:
+                    self.log.exception('Error in Anno Domini timer.')
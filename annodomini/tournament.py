@@ -0,0 +1,313 @@
+import asyncio
+import logging
+import math
+import random
+
+from collections import deque
+
+import discord
+
+from .annodominigame import (
+    AnnoDominiGame,
+    AnnoDominiPlayer,
+    TooManyGamesException
+)
+
+TABLE_SIZE = 4
+PAIRING_LOOKAHEAD = 8
+
+
+class AnnoDominiTableScheduler:
+    """
+    Caps how many tournament tables run at once in each server.
+
+    A table asks for a slot before its game starts. Once a server's
+    limit is reached, further tables wait in a queue and are handed a
+    slot, in order, as soon as a running table finishes.
+    """
+    def __init__(self):
+        self._running = {}
+        self._queues = {}
+
+    def running(self, guild_id: int) -> int:
+        """
+        Returns the number of tables running in a server.
+        """
+        return self._running.get(guild_id, 0)
+
+    def queued(self, guild_id: int) -> int:
+        """
+        Returns the number of tables waiting for a slot in a server.
+        """
+        return len(self._queues.get(guild_id, ()))
+
+    async def run(self, guild_id: int, limit: int, table):
+        """
+        Run a table once a slot is free and return its result.
+
+        Parameters
+        ----------
+        guild_id : `int`
+            Server the table is played in.
+        limit : `int`
+            Maximum number of tables running at once in that server.
+        table : `callable`
+            Returns the coroutine playing the table.
+        """
+        queue = self._queues.setdefault(guild_id, deque())
+        if queue or self.running(guild_id) >= limit:
+            slot = asyncio.get_running_loop().create_future()
+            queue.append(slot)
+            try:
+                await slot
+            except asyncio.CancelledError:
+                if slot.done() and not slot.cancelled():
+                    self._release(guild_id)  # handed a slot we won't use
+                elif slot in queue:
+                    queue.remove(slot)
+                raise
+        else:
+            self._running[guild_id] = self.running(guild_id) + 1
+        try:
+            return await table()
+        finally:
+            self._release(guild_id)
+
+    def _release(self, guild_id: int):
+        queue = self._queues.get(guild_id)
+        while queue:
+            slot = queue.popleft()
+            if not slot.done():
+                slot.set_result(None)  # the slot passes straight on
+                return
+        self._running[guild_id] -= 1
+        if not self._running[guild_id]:
+            del self._running[guild_id]
+            self._queues.pop(guild_id, None)
+
+
+class AnnoDominiTournament:
+    """
+    A Swiss-style tournament played over many tables of Anno Domini.
+
+    Every round splits the players into tables of up to `TABLE_SIZE`.
+    The first round is drawn at random. Later rounds seat players with
+    the same number of table wins together, avoiding players who have
+    already met where possible. Each table is an ordinary
+    `AnnoDominiGame`, run through the cog's table scheduler.
+
+    Attributes
+    ----------
+    cog : `commands.Cog`
+        A reference to the parent cog.
+    channel : `discord.TextChannel`
+        Channel the tournament is announced in.
+    owner : `discord.Member`
+        Member who opened the tournament.
+    topics : `list` of `str`
+        Topics the cards are drawn from.
+    players : `list` of `discord.Member`
+        Everyone signed up.
+    scores : `dict`
+        Maps each player's id to their number of table wins.
+    cards_left : `dict`
+        Maps each player's id to the cards they were left holding over
+        all rounds, used to break ties.
+    rounds : `int`
+        Number of rounds to play.
+    round_no : `int`
+        The round being played (0 before the start).
+    """
+    def __init__(self, parent, channel, owner, topics: list):
+        self.cog = parent
+        self.channel = channel
+        self.guild = channel.guild
+        self.owner = owner
+        self.topics = topics
+        self.players = []
+        self.scores = {}
+        self.cards_left = {}
+        self.rounds = 0
+        self.round_no = 0
+        self.log = logging.getLogger('red.redarmycogs.annodomini')
+        self._met = {}
+        self._task = None
+
+    @property
+    def started(self) -> bool:
+        return self._task is not None
+
+    def signup(self, member) -> bool:
+        """
+        Add a player. Returns False if they had already signed up.
+        """
+        if member.id in self.scores:
+            return False
+        self.players.append(member)
+        self.scores[member.id] = 0
+        self.cards_left[member.id] = 0
+        self._met[member.id] = set()
+        return True
+
+    def withdraw(self, member) -> bool:
+        """
+        Remove a player. Returns False if they weren't signed up.
+        """
+        if member.id not in self.scores:
+            return False
+        self.players = [p for p in self.players if p.id != member.id]
+        del self.scores[member.id]
+        del self.cards_left[member.id]
+        del self._met[member.id]
+        return True
+
+    def start(self, rounds: int = None):
+        """
+        Start playing in the background.
+        """
+        tables = math.ceil(len(self.players) / TABLE_SIZE)
+        self.rounds = rounds or max(1, math.ceil(math.log(tables, TABLE_SIZE)) + 1)
+        self._task = asyncio.create_task(self.run())
+        self._task.add_done_callback(self.error_callback)
+
+    def cancel(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    def error_callback(self, fut):
+        """
+        Checks for errors and forgets the tournament once it is over.
+        """
+        try:
+            fut.result()
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            self.log.exception('Error in Anno Domini tournament.')
+            asyncio.create_task(self.channel.send(
+                'A fatal error has occurred in the tournament, shutting down.'))
+        if self.cog.tournaments.get(self.channel.id) is self:
+            del self.cog.tournaments[self.channel.id]
+
+    def standings(self) -> list:
+        """
+        Returns the players, best first.
+        """
+        return sorted(self.players, key=lambda member: (
+            -self.scores[member.id], self.cards_left[member.id]))
+
+    def pair(self) -> list:
+        """
+        Seat the players at tables for the next round.
+
+        Players are ranked by score (at random within a score) and
+        tables are filled from the top of the ranking, preferring, among
+        the next few players, whoever has met the table least.
+        """
+        ranking = self.players[:]
+        random.shuffle(ranking)
+        ranking.sort(key=lambda member: -self.scores[member.id])
+        count = math.ceil(len(ranking) / TABLE_SIZE)
+        base, extra = divmod(len(ranking), count)
+        remaining = deque(ranking)
+        tables = []
+        for number in range(count):
+            table = [remaining.popleft()]
+            for _ in range(base + (number < extra) - 1):
+                best = min(
+                    range(min(len(remaining), PAIRING_LOOKAHEAD)),
+                    key=lambda i: (sum(
+                        remaining[i].id in self._met[member.id]
+                        for member in table), i))
+                table.append(remaining[best])
+                del remaining[best]
+            tables.append(table)
+        return tables
+
+    async def run(self):
+        """
+        Play every round and announce the results.
+        """
+        for round_no in range(1, self.rounds + 1):
+            self.round_no = round_no
+            tables = self.pair()
+            await self.channel.send(
+                f"**Round {self.round_no} of {self.rounds}**: "
+                f"{len(tables)} tables.")
+            limit = await self.cog.config.guild(self.guild).maxtables()
+            results = await asyncio.gather(*(
+                self.cog.tables.run(
+                    self.guild.id, limit,
+                    lambda number=number, table=table: self.play_table(number, table))
+                for number, table in enumerate(tables, 1)
+            ), return_exceptions=True)
+            for table, result in zip(tables, results):
+                if isinstance(result, Exception):
+                    self.log.error(
+                        "Anno Domini tournament table failed.", exc_info=result)
+                    continue
+                winner, cards_left = result
+                for member in table:
+                    self._met[member.id].update(m.id for m in table if m != member)
+                if winner is not None:
+                    self.scores[winner.id] += 1
+                for member_id, cards in cards_left.items():
+                    self.cards_left[member_id] += cards
+            await self.show_standings()
+        winner = self.standings()[0]
+        await self.channel.send(
+            f"{winner.mention} has won the tournament!")
+
+    async def play_table(self, number: int, table: list) -> tuple:
+        """
+        Play one table and return the winner and everyone’s cards left.
+        """
+        players = [member for member in table
+                   if self.cog.games.by_member(member) is None]
+        if len(players) < 2:
+            # everyone else is busy elsewhere, so whoever is left gets a bye
+            return (players[0] if players else None), {}
+        try:
+            game = AnnoDominiGame(self.cog, self.channel, self.topics)
+        except TooManyGamesException:
+            await self.channel.send(
+                f"Too many games in progress, table {number} can’t be played!")
+            raise
+        # threads can't hold threads, so such a table plays in the channel
+        if not isinstance(self.channel, discord.Thread):
+            try:
+                game.channel = await self.channel.create_thread(
+                    name=f"Round {self.round_no}, table {number}",
+                    type=discord.ChannelType.public_thread,
+                    auto_archive_duration=60)
+            except discord.HTTPException:
+                pass
+        self.cog.games.add(game)
+        try:
+            for idx, member in enumerate(players):
+                self.cog.games.add_player(game, AnnoDominiPlayer(member, owner=idx == 0))
+            self.cog.games.close_lobby(game)
+            await game.channel.send(
+                f"Round {self.round_no}, table {number}: "
+                f"{', '.join(member.mention for member in players)}")
+            await game.setup()
+        except Exception:
+            # don't leave the players stuck "in a game" that never started
+            self.cog.games.remove(game)
+            await self.channel.send(f"Table {number} couldn’t be set up!")
+            raise
+        await asyncio.wait([game._task])
+        winner = game.winner.member if game.winner else None
+        return winner, {player.member.id: len(player.cards) for player in game.players}
+
+    async def show_standings(self, top: int = 10):
+        """
+        Post the current leaders.
+        """
+        lines = [
+            f"{place}. {member.display_name}: {self.scores[member.id]} wins"
+            for place, member in enumerate(self.standings()[:top], 1)
+        ]
+        title = "Final standings" if self.round_no == self.rounds else \
+            f"Standings after round {self.round_no}"
+        await self.channel.send(f"**{title}**\n" + "\n".join(lines))
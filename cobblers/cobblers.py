@@ -1,10 +1,7 @@
 import asyncio
-import csv
 import random
-import re
 import time
 
-from pathlib import Path
 from typing import Literal, Optional
 
 import discord
@@ -23,8 +20,12 @@ from redbot.core.utils.chat_formatting import (
 
 from .cobblersgame import (
     CobblersGame,
+    CobblersSettings,
     TooManyGamesException
 )
+from .questionbank import CobblersQuestionStore
+from .rotation import CobblersRotation
+from .router import CobblersAnswerRouter, CobblersReactionRouter
 
 UNIQUE_ID = 262597293959968
 
@@ -41,6 +42,13 @@ class Cobblers(commands.Cog):
         self.games = []
         self.minplayers = 2
         self.maxplayers = 10
+        self.router = CobblersAnswerRouter()
+        self.reactions = CobblersReactionRouter()
+        self.questionbank = CobblersQuestionStore(
+            data_manager.bundled_data_path(self),
+            data_manager.cog_data_path(self) / "questions")
+        self.rotation = CobblersRotation(
+            data_manager.cog_data_path(self) / "seen")
         self.config = Config.get_conf(
             self,
             identifier=UNIQUE_ID,
@@ -116,6 +124,7 @@ class Cobblers(commands.Cog):
             langs = self._get_languages()
             if value in langs:
                 await self.config.guild(ctx.guild).language.set(value)
+                await self._update_settings(ctx.guild)
                 await ctx.send(f'You have now changed the language to '
                                f'{value}.')
             else:
@@ -137,6 +146,7 @@ class Cobblers(commands.Cog):
             value = self._return_value(value, int, 5, 100)
             if value:
                 await self.config.guild(ctx.guild).winningscore.set(value)
+                await self._update_settings(ctx.guild)
                 await ctx.send(f'You have now changed the score required '
                                f'to win to {value}.')
             else:
@@ -157,6 +167,7 @@ class Cobblers(commands.Cog):
             value = self._return_value(value, float, 5, 300)
             if value:
                 await self.config.guild(ctx.guild).setuptime.set(value)
+                await self._update_settings(ctx.guild)
                 await ctx.send(f'You have now changed the setup time to {value} '
                             f'seconds.')
             else:
@@ -178,6 +189,7 @@ class Cobblers(commands.Cog):
             value = self._return_value(value, float, 30, 600)
             if value:
                 await self.config.guild(ctx.guild).answersdelay.set(value)
+                await self._update_settings(ctx.guild)
                 await ctx.send(f'You have now changed the time allowed for '
                             f'submitting answers to {value} seconds.')
             else:
@@ -199,6 +211,7 @@ class Cobblers(commands.Cog):
             value = self._return_value(value, float, 10, 300)
             if value:
                 await self.config.guild(ctx.guild).votingdelay.set(value)
+                await self._update_settings(ctx.guild)
                 await ctx.send(f'You have now changed the voting time to '
                             f'{value} seconds.')
             else:
@@ -220,6 +233,7 @@ class Cobblers(commands.Cog):
                 await ctx.send('Players **will not** be mentioned by the game.')
         else:
             await self.config.guild(ctx.guild).doMention.set(value)
+            await self._update_settings(ctx.guild)
             if value:
                 await ctx.send('Players **will now** be mentioned by the game.')
             else:
@@ -433,7 +447,8 @@ class Cobblers(commands.Cog):
             value=f"Type **{prefix[0]}cobblers newgame** to set up a game."
                   f"Players can join the game before it starts be clicking "
                   f"the thumbs up. The game will that start automatically "
-                  f"after a certain time.",
+                  f"after a certain time, or sooner once it is full or its "
+                  f"creator clicks ▶️.",
             inline=False)
         embed.add_field(
             name="Answering",
@@ -486,26 +501,41 @@ class Cobblers(commands.Cog):
             mention_author=False
         )
 
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        """
+        Passes private messages on to any game waiting for the author's
+        answer.
+        """
+        self.router.dispatch(message)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        """
+        Passes reactions on to any game watching the message.
+        """
+        self.reactions.dispatch(payload, added=True)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
+        """
+        Passes removed reactions on to any game watching the message.
+        """
+        self.reactions.dispatch(payload, added=False)
+
     async def _get_topics(self, ctx: commands.Context) -> list:
         """
         Returns a list of topics available for the cog language.
         """
         language = await self.config.guild(ctx.guild).language()
-        sourcefile = Path.joinpath(data_manager.bundled_data_path(self),
-                                   f"data-{language}.csv")
-        with open(sourcefile, "r", encoding="utf8") as source:  # TODO: detect encoding
-            reader = csv.DictReader(source, delimiter=",")
-            return {row["topic"] for row in reader}
+        bank = await self.questionbank.get(language)
+        return set(bank.topics)
 
     def _get_languages(self) -> list:
         """
         Returns a list of languages available for the cog.
         """
-        folder = data_manager.bundled_data_path(self)
-        return [
-            re.sub(r"data-(\w+)\.csv", r"\1", p.name)
-            for p in folder.iterdir()
-            if p.is_file() and p.name.endswith("csv")]
+        return self.questionbank.languages()
 
     def _get_running_game(self, ctx: commands.Context) -> \
         Optional[CobblersGame]:
@@ -530,6 +560,17 @@ class Cobblers(commands.Cog):
                     return game
         return None
 
+    async def _update_settings(self, guild: discord.Guild):
+        """
+        Hands a server’s changed settings to the games running there.
+        """
+        games = [game for game in self.games
+                 if game.ctx.guild.id == guild.id and game.settings is not None]
+        if games:
+            settings = await CobblersSettings.load(self.config, guild)
+            for game in games:
+                game.settings = settings
+
     @staticmethod
     def _return_value(val, type, min, max):
         """
@@ -546,6 +587,7 @@ class Cobblers(commands.Cog):
             return None
 
     def cog_unload(self):
+        self.rotation.close()
         return [game._task.cancel() for game in self.games]
 
 
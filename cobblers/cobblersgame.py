@@ -1,5 +1,4 @@
 import asyncio
-import csv
 import logging
 import random
 import re
@@ -7,18 +6,19 @@ import time
 import traceback
 
 from collections import Counter
-from pathlib import Path
+from typing import NamedTuple
 
 import discord
-from discord.abc import PrivateChannel
 
 from redbot.core.utils.chat_formatting import pagify, humanize_list
 from redbot.core.utils.menus import start_adding_reactions
-from redbot.core import (
-    data_manager
-)
+
+from .router import CobblersLobby, CobblersVotes
 
 CATEGORIES = ["Films", "Words", "Dates", "Laws", "Film Synopses"]
+VOTE_SYMBOLS = [
+    "1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣", "6️⃣", "7️⃣", "8️⃣", "9️⃣", "🔟"
+]
 EXPLANATIONS = {
     "Films": "Send me your synopsis of this film per private message!",
     "Words": "Send me your definition of this word per private message!",
@@ -32,6 +32,29 @@ class TooManyGamesException(Exception):
     pass
 
 
+class CobblersSettings(NamedTuple):
+    """
+    A game’s own copy of its server’s settings.
+
+    Read once when the game is set up, so the game loop never awaits
+    Config, and replaced whenever the server’s settings change.
+    """
+    language: str
+    winningscore: int
+    setuptime: float
+    answersdelay: float
+    votingdelay: float
+    doMention: bool
+
+    @classmethod
+    async def load(cls, config, guild) -> "CobblersSettings":
+        """
+        Read a server’s settings in one go.
+        """
+        values = await config.guild(guild).all()
+        return cls(*(values[field] for field in cls._fields))
+
+
 class CobblersGame:
     """
     Class to run a game of Cobblers.
@@ -49,7 +72,9 @@ class CobblersGame:
     players : `list` of `AnnoDominiPlayer`
         Players in the game.
     questions : `list` of `dict`
-        Questions with topic, name and solution.
+        Questions with id, topic, name and solution.
+    seen : `CobblersSeenQuestions`
+        The server’s seen questions, marked as each question is asked.
     question : `dict`
         The current question
     answers : `list` of `tuple`
@@ -66,6 +91,8 @@ class CobblersGame:
         Current message ready to be sent. (unused)
     live : `bool`
         Probably unnecessary game state.
+    settings : `CobblersSettings`
+        The server’s settings, from the moment the game was set up.
     """
     def __init__(self, parent, ctx):
         self.cog = parent
@@ -75,12 +102,14 @@ class CobblersGame:
         self.players = []
         self.questions = []
         self.question = None  # current question
+        self.seen = None
         self.answers = []
         self.board_embed = None
         self.round_no = 0
         self.scores = Counter()
         self.log = logging.getLogger('red.redarmycogs.cobblers')
         self.msg = ''
+        self.settings = None
         self._last_play = int(time.time())  # TODO: integrate this?
         self._task = None
 
@@ -135,21 +164,48 @@ class CobblersGame:
             pass
 
     async def get_players(self):
-        countdown = await self.cog.config.guild(self.ctx.guild).setuptime()
-        message = await self.ctx.message.channel.send(
-            f"Join the game now by giving your 👍\n"
-            f"The game will start in {int(countdown)} seconds!")
-        await message.add_reaction("👍")
-        await asyncio.sleep(countdown)
-        message = await self.ctx.channel.fetch_message(message.id)
-        for reaction in message.reactions:
-            if str(reaction) == "👍":
-                async for user in reaction.users():
-                    if user not in self.players and user != self.cog.bot.user \
-                        and len(self.players) < self.cog.maxplayers:
-                        self.players.append(user)
-
-        if await self.cog.config.guild(self.ctx.guild).mentions():
+        """
+        Run the lobby until the setup time is up or the game can start.
+
+        Players join by reacting to the lobby message, which keeps a
+        running count. The game starts early once it is full or the
+        owner gives the message a ▶️.
+        """
+        lobby = CobblersLobby(self.ctx.author, self.players,
+                              self.cog.minplayers, self.cog.maxplayers)
+        deadline = asyncio.get_running_loop().time() + self.settings.setuptime
+        starts = int(time.time() + self.settings.setuptime)
+
+        def lobby_text():
+            return (
+                f"Join the game now by giving your {lobby.JOIN} "
+                f"({len(self.players)}/{self.cog.maxplayers} players)\n"
+                f"The game will start <t:{starts}:R>, or as soon as "
+                f"{self.ctx.author.display_name} gives it a {lobby.START}!")
+
+        message = await self.ctx.channel.send(lobby_text())
+        reactions = self.cog.reactions
+        reactions.watch(message.id, lobby)
+        ready = asyncio.create_task(lobby.ready.wait())
+        try:
+            await message.add_reaction(lobby.JOIN)
+            await message.add_reaction(lobby.START)
+            while not lobby.ready.is_set():
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                changed = asyncio.create_task(lobby.changed.wait())
+                await asyncio.wait({ready, changed}, timeout=timeout,
+                                   return_when=asyncio.FIRST_COMPLETED)
+                changed.cancel()
+                if lobby.changed.is_set():
+                    lobby.changed.clear()
+                    await message.edit(content=lobby_text())
+        finally:
+            ready.cancel()
+            reactions.discard(message.id)
+
+        if self.settings.doMention:
             player_names = [player.mention for player in self.players]
         else:
             player_names = [player.display_name for player in self.players]
@@ -161,10 +217,11 @@ class CobblersGame:
         """
         Initialises the game.
         """
+        self.settings = await CobblersSettings.load(self.cog.config, self.ctx.guild)
         self._task = asyncio.create_task(self.get_players())
         await self._task
         if not self.enough_players():
-            self.ctx.send("Not enough players to start. Quitting!")
+            await self.ctx.send("Not enough players to start. Quitting!")
             self.cog.games.remove(self)
             return
         await self.get_questions()
@@ -176,8 +233,7 @@ class CobblersGame:
         """
         Checks if someone has won.
         """
-        win_score = await self.cog.config.guild(self.ctx.guild).winningscore()
-        if any(score >= win_score for score in self.scores.values()):
+        if any(score >= self.settings.winningscore for score in self.scores.values()):
             return True
         return False
 
@@ -199,10 +255,6 @@ class CobblersGame:
                     "Not enough players to continue. Quitting!")
                 self.cog.games.remove(self)
                 return
-            ans_delay = \
-                await self.cog.config.guild(self.ctx.guild).answersdelay()
-            vote_delay = \
-                await self.cog.config.guild(self.ctx.guild).votingdelay()
             if await self.check_winner():
                 break
             await self.new_round()
@@ -210,8 +262,10 @@ class CobblersGame:
                 self.question = self.questions.pop()
             except IndexError:
                 # add another 20 questions if 100 somehow weren’t enough
-                self.questions = self.get_questions(20)
+                await self.get_questions(20)
                 self.question = self.questions.pop()
+            self.seen.mark(self.question['id'])
+            self.cog.rotation.save(self.ctx.guild.id, self.seen)
 
             embed = discord.Embed(
                 colour=discord.Colour.dark_blue(),
@@ -222,22 +276,17 @@ class CobblersGame:
                 name=f"Cobblers: Round #{self.round_no}")
             self.board_embed = await self.ctx.send(
                 embed=embed)
-            for player in self.players:
-                await player.send(
-                    f"{self.question['topic']}: {self.question['name']}\n"
-                    f"Type your answer to me below:"
-                    )
             # identify the author of the correct answer as `False`
             self.answers.append((False, self.question['solution']))
 
-            # wait for player answers, shuffle them and update the board
-            await self.wait_for_answers(ans_delay)
+            # ask for player answers, shuffle them and update the board
+            await self.wait_for_answers(self.settings.answersdelay)
             random.shuffle(self.answers)
             embed = await self._build_board_embed(reveal=False)
             await self.updateboard(embed)
 
             # wait for players to vote, then display scores
-            votes = await self.wait_for_votes(vote_delay)
+            votes = await self.wait_for_votes(self.settings.votingdelay)
             embed = await self._build_board_embed(reveal=True)
             await self.updateboard(embed)
             if votes:
@@ -289,6 +338,9 @@ class CobblersGame:
         """
         Wait for votes from players.
 
+        Votes are counted from reaction events as they happen, and
+        voting closes as soon as every player has voted.
+
         Parameters
         ----------
         delay : `float`
@@ -299,53 +351,27 @@ class CobblersGame:
         votes : `Counter`
             A dictionary of the points scored this round.
         """
-        symbols = [
-            "1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣", "6️⃣", "7️⃣", "8️⃣", "9️⃣", "🔟"
-        ]
-
-        # add reactions to the board for players to click
-        for idx in range(len(self.answers)):
-            await self.board_embed.add_reaction(symbols[idx])
-        await asyncio.sleep(delay)
-
-        votes = Counter()
-        voted = []  # only allow players to vote once
-
-        # refresh the message to get reactions after the voting has ended
-        message = await self.ctx.channel.fetch_message(self.board_embed.id)
-        for reaction in message.reactions:
-            if str(reaction.emoji) in symbols:
-                async for voter in reaction.users():
-                    if voter not in self.players or voter == self.ctx.bot \
-                        or voter in voted:
-                        continue  # TODO: potentially allow foreign votes?
-                    votee = self.answers[symbols.index(str(reaction))][0]
-                    if votee is False:
-                        votes[voter] += 2  # 2 pts for correct answer
-                        voted.append(voter)
-                        continue
-                    if voter != votee:
-                        votes[votee] += 1  # 1 pt for being voted for
-                        voted.append(voter)
-        return votes
-
-    async def _answer_helper(self, player: discord.User, delay: float):
-        """
-        Helper method to return player answers
-        """
+        votes = CobblersVotes(self.players, self.answers, VOTE_SYMBOLS)
+        reactions = self.cog.reactions
+        reactions.watch(self.board_embed.id, votes)
         try:
-            answer = await self.ctx.bot.wait_for(
-                "message", check=lambda m: (
-                    isinstance(m.channel, PrivateChannel) and
-                    m.author.id == player.id
-                ), timeout=delay
-            )
-            return answer
-        except asyncio.TimeoutError:
-            raise asyncio.TimeoutError
+            # add reactions to the board for players to click
+            for symbol in votes.symbols:
+                await self.board_embed.add_reaction(symbol)
+            try:
+                await asyncio.wait_for(votes.complete.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+        finally:
+            reactions.discard(self.board_embed.id)
+        return votes.tally()
 
     async def wait_for_answers(self, delay: float):
-        """Wait for answers from players.
+        """Send players the question and wait for their answers.
+
+        Answers arrive through the cog's answer router. The round
+        closes as soon as every player has answered or the time runs
+        out, so players get one answer each.
 
         Parameters
         ----------
@@ -357,19 +383,20 @@ class CobblersGame:
         bool
             `True` if the session wasn’t interrupted.
         """
-        answers = await asyncio.gather(
-            *[self._answer_helper(player, delay) for player in self.players],
-            return_exceptions=True
-        )
-        for answer in answers:
-            if type(answer) is asyncio.TimeoutError:
-                continue
-            self.answers.append((
-                answer.author,
-                answer.content[:1000]
-                if len(answer.content) > 1000
-                else answer.content
-                ))
+        answers = self.cog.router.expect(self.players)
+        try:
+            for player in self.players:
+                await player.send(
+                    f"{self.question['topic']}: {self.question['name']}\n"
+                    f"Type your answer to me below:"
+                    )
+            try:
+                await asyncio.wait_for(answers.complete.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+        finally:
+            self.cog.router.discard(answers)
+        self.answers.extend(answers.answers.values())
         return True
 
     async def send(self):
@@ -392,34 +419,36 @@ class CobblersGame:
 
         Notes
         -----
-        Questions consist of a `topic`, `name` and `solution`.
+        Questions consist of an `id`, `topic`, `name` and `solution`.
 
         Films can be added forwards and backwards (i.e. from the title,
         write a synopsis; from the synopsis, write a film title)
+
+        Questions are drawn by random index from the compiled question
+        bank, so nothing needs to be parsed, skipping any the server has
+        already been asked. They only count as asked once `run` gets to
+        them.
         """
-        language = await self.cog.config.guild(self.ctx.guild).language()
-        sourcefile = Path.joinpath(data_manager.bundled_data_path(self),
-                                   f"data-{language}.csv")
-        with open(sourcefile, "r", encoding="utf8") as source:  # TODO: detect encoding
-            reader = csv.DictReader(source, delimiter=",")
-            buckets = {category: [] for category in CATEGORIES}
-            for row in reader:
-                # randomly add half films backwards
-                if row['topic'] == 'Films' and random.choice([True, False]):
-                    buckets['Film Synopses'].append(
-                        {
-                            'topic': 'Film Synopses',
-                            'name': row['solution'],
-                            'solution': row['name']
-                        }
-                    )
-                    continue
-                buckets[row['topic']].append(row)
-        no_of_qs_per_cat = round(questions / len(buckets))
-        for bucket in buckets.values():
-            random.shuffle(bucket)
-            self.questions.extend(bucket[:no_of_qs_per_cat])
-        del buckets
+        bank = await self.cog.questionbank.get(self.settings.language)
+        seen = self.seen = await self.cog.rotation.get(self.ctx.guild.id, bank)
+        held = [question['id'] for question in self.questions]
+        counts = {category: round(questions / len(CATEGORIES))
+                  for category in CATEGORIES}
+        # synopses are films asked backwards, so draw both from the films
+        counts['Films'] += counts.pop('Film Synopses')
+        for topic, count in counts.items():
+            for idx in seen.draw(topic, count, skip=held):
+                question = bank.question(idx)
+                question['id'] = idx
+                # randomly ask half the films backwards
+                if topic == 'Films' and random.choice([True, False]):
+                    question = {
+                        'id': idx,
+                        'topic': 'Film Synopses',
+                        'name': question['solution'],
+                        'solution': question['name']
+                    }
+                self.questions.append(question)
         random.shuffle(self.questions)
 
     async def update_scores(self):
@@ -0,0 +1,318 @@
+"""
+Compiled Cobblers question banks.
+
+A question bank's CSV source is compiled once into a binary file that
+can be memory-mapped: questions are grouped by topic, each topic's
+questions sit between two entries of a bounds table, and all the text
+lives in one UTF-8 blob reached through an offset table. Picking a
+question is a random index into its topic; nothing is parsed when a
+game starts.
+
+The cog compiles banks by itself whenever a source file changes; the
+command line tool checks or compiles source files by hand::
+
+    python -m cobblers.questionbank validate data/data-en.csv
+    python -m cobblers.questionbank compile data/data-en.csv -o data-en.bank
+"""
+import argparse
+import asyncio
+import bisect
+import csv
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+
+from array import array
+from pathlib import Path
+
+MAGIC = b"CQB1"
+HEADER = struct.Struct("<4sIIIq")
+FIELDS = 2  # name, solution
+
+
+class CobblersQuestionBank:
+    """
+    Read-only view of a compiled question bank.
+
+    Questions are numbered in topic order, so every topic's questions
+    have consecutive ids. Every table is a `memoryview` straight onto
+    the underlying buffer, so nothing is copied.
+
+    Attributes
+    ----------
+    language : `str`
+        Language of the questions.
+    mtime : `int`
+        Modification time (ns) of the source file the bank was compiled
+        from.
+    topic_bounds : `memoryview`
+        Id of each topic's first question, plus the end.
+
+    Raises
+    ------
+    `ValueError`
+        If the buffer is not a compiled question bank.
+    """
+    def __init__(self, language: str, buffer):
+        self.language = language
+        view = memoryview(buffer)
+        try:
+            magic, count, topics, blob_size, self.mtime = HEADER.unpack_from(view)
+        except struct.error as exc:
+            raise ValueError("Truncated Cobblers question bank.") from exc
+        if magic != MAGIC:
+            raise ValueError("Not a compiled Cobblers question bank.")
+        self._count = count
+        offset = HEADER.size
+        sections = []
+        for fmt, length in (("I", topics + 1), ("I", FIELDS * count + topics + 1),
+                            ("B", blob_size)):
+            end = offset + length * struct.calcsize(fmt)
+            if end > len(view):
+                raise ValueError("Truncated Cobblers question bank.")
+            sections.append(view[offset:end].cast(fmt))
+            offset = end
+        self.topic_bounds, self._offsets, self._blob = sections
+        first = FIELDS * count
+        self.topics = [self._string(first + topic) for topic in range(topics)]
+
+    def __len__(self):
+        return self._count
+
+    def _string(self, idx: int) -> str:
+        return str(self._blob[self._offsets[idx]:self._offsets[idx+1]], "utf8")
+
+    def topic_range(self, topic: str) -> range:
+        """
+        Returns the ids of a topic's questions (empty if there are none).
+        """
+        try:
+            number = self.topics.index(topic)
+        except ValueError:
+            return range(0)
+        return range(self.topic_bounds[number], self.topic_bounds[number+1])
+
+    def topic(self, idx: int) -> str:
+        """
+        Returns the topic of a question.
+        """
+        return self.topics[bisect.bisect_right(self.topic_bounds, idx) - 1]
+
+    def question(self, idx: int) -> dict:
+        """
+        Returns a question's `topic`, `name` and `solution`.
+        """
+        first = idx * FIELDS
+        return {
+            "topic": self.topic(idx),
+            "name": self._string(first),
+            "solution": self._string(first + 1)
+        }
+
+    @classmethod
+    def open(cls, language: str, path: Path) -> "CobblersQuestionBank":
+        """
+        Memory-map a compiled question bank file.
+        """
+        with open(path, "rb") as fp:
+            buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(language, buffer)
+
+
+class CobblersQuestionStore:
+    """
+    Process-wide cache of question banks, loaded once per language.
+
+    Each source file is compiled into the `cache` folder the first time
+    it is needed, and again only when it has changed. Compiling happens
+    in the default executor to keep the event loop free.
+
+    Attributes
+    ----------
+    path : `Path`
+        Folder containing the `data-{language}.csv` files.
+    cache : `Path`
+        Folder for compiled question banks.
+    """
+    def __init__(self, path: Path, cache: Path):
+        self.path = path
+        self.cache = cache
+        self.log = logging.getLogger('red.redarmycogs.cobblers')
+        self._banks = {}
+        self._locks = {}
+
+    def sourcefile(self, language: str) -> Path:
+        """
+        Returns the path of the source file for a language.
+        """
+        return Path.joinpath(self.path, f"data-{language}.csv")
+
+    def languages(self) -> list:
+        """
+        Returns a list of languages with a source file.
+        """
+        return [
+            re.sub(r"data-(\w+)\.csv", r"\1", p.name)
+            for p in self.path.iterdir()
+            if p.is_file() and p.name.endswith("csv")]
+
+    async def get(self, language: str) -> CobblersQuestionBank:
+        """
+        Returns the question bank for a language, (re)loading it if
+        necessary.
+        """
+        sourcefile = self.sourcefile(language)
+        mtime = sourcefile.stat().st_mtime_ns
+        bank = self._banks.get(language)
+        if bank is not None and bank.mtime == mtime:
+            return bank
+        lock = self._locks.setdefault(language, asyncio.Lock())
+        async with lock:
+            bank = self._banks.get(language)
+            if bank is not None and bank.mtime == mtime:
+                return bank  # loaded while we were waiting
+            loop = asyncio.get_running_loop()
+            bank = await loop.run_in_executor(
+                None, self._load, language, sourcefile, mtime)
+            self._banks[language] = bank
+            return bank
+
+    def _load(self, language: str, sourcefile: Path, mtime: int) -> CobblersQuestionBank:
+        """
+        Load the question bank for a source file, compiling it first if
+        the compiled bank is missing or out of date.
+        """
+        compiled = Path.joinpath(self.cache, f"data-{language}.bank")
+        try:
+            current = source_mtime(compiled) == mtime
+        except (OSError, ValueError):
+            current = False
+        if not current:
+            rows, errors = read_source(sourcefile)
+            for error in errors:
+                self.log.warning(f"Skipping bad Cobblers question: {error}")
+            data = compile_rows(rows, mtime)
+            try:
+                self.cache.mkdir(parents=True, exist_ok=True)
+                write(compiled, data)
+            except OSError:
+                self.log.exception(f"Could not compile the {language} questions.")
+                return CobblersQuestionBank(language, data)
+        return CobblersQuestionBank.open(language, compiled)
+
+
+def source_mtime(path: Path) -> int:
+    """
+    Returns the source file modification time recorded in a compiled
+    question bank, reading only its header.
+
+    Raises
+    ------
+    `ValueError`
+        If the file is not a compiled question bank.
+    """
+    with open(path, "rb") as fp:
+        header = fp.read(HEADER.size)
+    if len(header) < HEADER.size or header[:4] != MAGIC:
+        raise ValueError("Not a compiled Cobblers question bank.")
+    return HEADER.unpack(header)[4]
+
+
+def read_source(sourcefile: Path) -> tuple:
+    """
+    Parse a source file, collecting every bad row instead of stopping
+    at the first.
+
+    Returns
+    -------
+    `tuple`
+        (list of (topic, name, solution), list of error messages)
+    """
+    rows, errors = [], []
+    with open(sourcefile, "r", encoding="utf8", newline="") as source:
+        reader = csv.DictReader(source, delimiter=",")
+        for row in reader:
+            missing = [field for field in ("topic", "name", "solution")
+                       if not row.get(field)]
+            if missing:
+                errors.append(f"{sourcefile.name}:{reader.line_num}: "
+                              f"missing {', '.join(missing)}")
+                continue
+            rows.append((row["topic"], row["name"], row["solution"]))
+    return rows, errors
+
+
+def compile_rows(rows: list, mtime: int) -> bytes:
+    """
+    Build a compiled question bank from parsed rows.
+    """
+    topics = list(dict.fromkeys(row[0] for row in rows))
+    topic_bounds = array("I")
+    strings = []
+    for topic in topics:
+        topic_bounds.append(len(strings) // FIELDS)
+        for row in rows:
+            if row[0] == topic:
+                strings.extend(row[1:])
+    topic_bounds.append(len(strings) // FIELDS)
+    strings.extend(topics)
+    blob = bytearray()
+    offsets = array("I", [0])
+    for string in strings:
+        blob += string.encode("utf8")
+        offsets.append(len(blob))
+    parts = [
+        HEADER.pack(MAGIC, len(rows), len(topics), len(blob), mtime),
+        topic_bounds.tobytes(), offsets.tobytes(), bytes(blob)
+    ]
+    return b"".join(parts)
+
+
+def write(path: Path, data: bytes):
+    """
+    Write a compiled question bank, replacing any old one in a single
+    step.
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as fp:
+        fp.write(data)
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Check or compile Cobblers question source files.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    validate = subparsers.add_parser("validate", help="check source files for bad rows")
+    validate.add_argument("sources", type=Path, nargs="+")
+    compile_ = subparsers.add_parser("compile", help="compile a source file")
+    compile_.add_argument("source", type=Path)
+    compile_.add_argument("-o", "--output", type=Path,
+                          help="defaults to the source file with a .bank suffix")
+    args = parser.parse_args(argv)
+
+    failed = False
+    sources = args.sources if args.command == "validate" else [args.source]
+    for source in sources:
+        rows, errors = read_source(source)
+        for error in errors:
+            print(error, file=sys.stderr)
+        if errors:
+            failed = True
+            print(f"{source}: {len(errors)} bad rows", file=sys.stderr)
+            continue
+        if args.command == "compile":
+            output = args.output or source.with_suffix(".bank")
+            write(output, compile_rows(rows, source.stat().st_mtime_ns))
+            print(f"{source}: {len(rows)} questions compiled to {output}")
+        else:
+            print(f"{source}: {len(rows)} questions ok")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import os
+import random
+import struct
+
+from pathlib import Path
+
+HEADER = struct.Struct("<qI")  # source mtime of the bank, number of questions
+
+
+class CobblersSeenQuestions:
+    """
+    Which questions of a bank a server has already been asked.
+
+    One bit per question, so the whole English bank fits in about
+    4.5 KB, plus a running count of the unseen questions in each topic.
+    Once a topic has been asked in full it starts over.
+
+    Attributes
+    ----------
+    bank : `CobblersQuestionBank`
+        The question bank the bits refer to.
+    bits : `bytearray`
+        Bit ``idx`` is set once question ``idx`` has been asked.
+    unseen : `dict`
+        Maps each topic to the number of its questions not yet asked.
+    """
+    def __init__(self, bank, bits: bytearray = None):
+        self.bank = bank
+        self.bits = bits if bits is not None else bytearray((len(bank) + 7) // 8)
+        self.unseen = {
+            topic: sum(not self.seen(idx) for idx in bank.topic_range(topic))
+            for topic in bank.topics
+        }
+        self._pools = {}  # topic -> (unseen ids, their positions)
+
+    def seen(self, idx: int) -> bool:
+        """
+        Returns whether a question has been asked.
+        """
+        return bool(self.bits[idx >> 3] & (1 << (idx & 7)))
+
+    def mark(self, idx: int):
+        """
+        Record a question as asked, starting its topic over once every
+        question of it has been.
+        """
+        if self.seen(idx):
+            return
+        topic = self.bank.topic(idx)
+        self.bits[idx >> 3] |= 1 << (idx & 7)
+        self.unseen[topic] -= 1
+        if not self.unseen[topic]:
+            self.reset(topic)
+            return
+        pool = self._pools.get(topic)
+        if pool is not None:  # swap-remove it from the unseen pool
+            ids, positions = pool
+            pos = positions.pop(idx)
+            last = ids.pop()
+            if last != idx:
+                ids[pos] = last
+                positions[last] = pos
+
+    def reset(self, topic: str):
+        """
+        Forget which questions of a topic have been asked.
+        """
+        ids = self.bank.topic_range(topic)
+        for idx in ids:
+            self.bits[idx >> 3] &= ~(1 << (idx & 7)) & 0xFF
+        self.unseen[topic] = len(ids)
+        self._pools.pop(topic, None)
+
+    def draw(self, topic: str, count: int, rng=random, skip=()) -> list:
+        """
+        Pick questions of a topic the server hasn’t been asked yet.
+
+        Nothing is marked as seen: a game calls `mark` as it asks each
+        question, so questions it never gets to stay in the rotation.
+
+        While at least half of the topic is unseen, random ids are drawn
+        until an unseen one turns up, which takes fewer than two tries
+        on average. After that, the unseen ids are collected into a pool
+        once, which `mark` keeps up to date, and each draw takes a
+        random one from it. If there are too few, the rest are
+        questions asked before, as the topic is about to start over.
+
+        Parameters
+        ----------
+        skip : `iterable` of `int`
+            Ids not to pick, e.g. the questions a game already holds.
+
+        Returns
+        -------
+        `list` of `int`
+            Ids of the drawn questions.
+        """
+        ids = self.bank.topic_range(topic)
+        taken = set(skip)
+        count = min(count, len(ids) - sum(idx in ids for idx in taken))
+        drawn = []
+        if 2 * self.unseen[topic] >= len(ids) \
+                and self.unseen[topic] >= 2 * (count + len(taken)):
+            while len(drawn) < count:
+                idx = rng.choice(ids)
+                if not self.seen(idx) and idx not in taken:
+                    taken.add(idx)
+                    drawn.append(idx)
+            return drawn
+        pool = self._pools.get(topic)
+        if pool is None:
+            unseen = [idx for idx in ids if not self.seen(idx)]
+            pool = self._pools[topic] = (
+                unseen, {idx: pos for pos, idx in enumerate(unseen)})
+        unseen, positions = pool
+        # shuffle the front of the pool into place, passing over ids
+        # the game already holds, without taking anything out of it
+        for pos in range(len(unseen)):
+            if len(drawn) == count:
+                return drawn
+            pick = rng.randrange(pos, len(unseen))
+            unseen[pos], unseen[pick] = unseen[pick], unseen[pos]
+            positions[unseen[pos]] = pos
+            positions[unseen[pick]] = pick
+            if unseen[pos] not in taken:
+                taken.add(unseen[pos])
+                drawn.append(unseen[pos])
+        while len(drawn) < count:
+            idx = rng.choice(ids)
+            if idx not in taken:  # every unseen one is taken by now
+                taken.add(idx)
+                drawn.append(idx)
+        return drawn
+
+
+class CobblersRotation:
+    """
+    Keeps the seen questions of every server and saves them to disk.
+
+    Bitsets live in memory and changed ones are written out in one
+    batch, from the default executor, at most every `interval` seconds.
+    A saved bitset only applies to the version of the bank it was made
+    for; once the source file changes the server starts over.
+
+    Attributes
+    ----------
+    path : `Path`
+        Folder holding one ``{guild id}-{language}.bin`` file per server
+        and language.
+    """
+    def __init__(self, path: Path, interval: float = 60.0):
+        self.path = path
+        self.interval = interval
+        self.log = logging.getLogger('red.redarmycogs.cobblers')
+        self._seen = {}
+        self._dirty = set()
+        self._task = None
+
+    async def get(self, guild_id: int, bank) -> CobblersSeenQuestions:
+        """
+        Returns the seen questions of a server, loading them if necessary.
+        """
+        key = (guild_id, bank.language)
+        seen = self._seen.get(key)
+        if seen is not None and seen.bank.mtime == bank.mtime:
+            seen.bank = bank
+            return seen
+        loop = asyncio.get_running_loop()
+        bits = await loop.run_in_executor(None, self._read, key, bank)
+        seen = self._seen.get(key)
+        if seen is not None and seen.bank.mtime == bank.mtime:
+            return seen  # loaded while we were waiting
+        seen = CobblersSeenQuestions(bank, bits)
+        self._seen[key] = seen
+        return seen
+
+    def save(self, guild_id: int, seen: CobblersSeenQuestions):
+        """
+        Schedule a server’s seen questions to be saved.
+        """
+        self._dirty.add((guild_id, seen.bank.language))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._save_later())
+
+    def close(self):
+        """
+        Write out unsaved bitsets synchronously, e.g. when the cog unloads.
+        """
+        if self._task is not None:
+            self._task.cancel()
+        for key, data in self._take():
+            self._write(key, data)
+
+    def _take(self) -> list:
+        batch = []
+        for key in self._dirty:
+            seen = self._seen[key]
+            header = HEADER.pack(seen.bank.mtime, len(seen.bank))
+            batch.append((key, header + bytes(seen.bits)))
+        self._dirty.clear()
+        return batch
+
+    async def _save_later(self):
+        await asyncio.sleep(self.interval)
+        loop = asyncio.get_running_loop()
+        for key, data in self._take():
+            try:
+                await loop.run_in_executor(None, self._write, key, data)
+            except OSError:
+                self.log.exception(f"Could not save seen questions for {key[0]}.")
+
+    def _file(self, key: tuple) -> Path:
+        return Path.joinpath(self.path, f"{key[0]}-{key[1]}.bin")
+
+    def _write(self, key: tuple, data: bytes):
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp = Path.joinpath(self.path, f"{key[0]}-{key[1]}.bin.tmp")
+        with open(tmp, "wb") as fp:
+            fp.write(data)
+        os.replace(tmp, self._file(key))
+
+    def _read(self, key: tuple, bank) -> bytearray:
+        try:
+            data = self._file(key).read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            mtime, count = HEADER.unpack_from(data)
+        except struct.error:
+            self.log.warning(f"Seen questions for {key[0]} are corrupt, starting over.")
+            return None
+        bits = bytearray(data[HEADER.size:])
+        if mtime != bank.mtime or count != len(bank) or len(bits) != (count + 7) // 8:
+            return None  # made for another version of the bank
+        return bits
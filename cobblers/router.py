@@ -0,0 +1,257 @@
+import asyncio
+
+from collections import Counter
+
+MAX_ANSWER_LENGTH = 1000
+
+
+class CobblersAnswers:
+    """
+    The answers sent in for one round of a game.
+
+    Attributes
+    ----------
+    players : `set` of `int`
+        Discord ids of the players expected to answer.
+    answers : `dict`
+        Maps each player's id to their latest (author, answer).
+    complete : `asyncio.Event`
+        Set once every player has answered, which closes the round
+        straight away.
+    """
+    def __init__(self, players):
+        self.players = {player.id for player in players}
+        self.answers = {}
+        self.complete = asyncio.Event()
+
+    def submit(self, author, content: str):
+        """
+        Record a player's answer.
+
+        A player who answers again before the round closes replaces
+        their earlier answer, but the round closes as soon as the last
+        player has answered, so this is not an editing window: there
+        is none for whoever answers last.
+        """
+        self.answers[author.id] = (author, content[:MAX_ANSWER_LENGTH])
+        if len(self.answers) >= len(self.players):
+            self.complete.set()
+
+
+class CobblersVotes:
+    """
+    The votes cast on one round's board, tallied as reactions come in.
+
+    Each player has one vote: whichever answer they reacted to last
+    and haven't taken back. Reactions from anybody else, and votes for
+    a player's own answer, are ignored.
+
+    Attributes
+    ----------
+    players : `dict`
+        Maps each player's id to the player.
+    symbols : `list` of `str`
+        The reaction for each answer.
+    authors : `list`
+        Author of each answer (`False` for the real one).
+    complete : `asyncio.Event`
+        Set once every player has voted.
+    """
+    def __init__(self, players, answers, symbols):
+        self.players = {player.id: player for player in players}
+        self.symbols = symbols[:len(answers)]
+        self.authors = [author for author, _ in answers]
+        self.complete = asyncio.Event()
+        self._reactions = {}  # player id -> answer indices, in order
+
+    def react(self, payload, added: bool):
+        """
+        Count a reaction being added to or removed from the board.
+        """
+        user_id, emoji = payload.user_id, str(payload.emoji)
+        if user_id not in self.players or emoji not in self.symbols:
+            return
+        idx = self.symbols.index(emoji)
+        author = self.authors[idx]
+        if author is not False and author.id == user_id:
+            return
+        reactions = self._reactions.setdefault(user_id, [])
+        if idx in reactions:
+            reactions.remove(idx)
+        if added:
+            reactions.append(idx)
+        elif not reactions:
+            del self._reactions[user_id]
+        if len(self._reactions) >= len(self.players):
+            self.complete.set()
+
+    def tally(self) -> Counter:
+        """
+        Returns the points scored: 2 for each player who found the real
+        answer and 1 for each vote a player's answer received.
+        """
+        points = Counter()
+        for user_id, reactions in self._reactions.items():
+            author = self.authors[reactions[-1]]
+            if author is False:
+                points[self.players[user_id]] += 2
+            else:
+                points[author] += 1
+        return points
+
+
+class CobblersLobby:
+    """
+    Players joining a game by reacting to its lobby message.
+
+    A 👍 joins the game and taking it back leaves again. The game is
+    ready once it is full, or once it has enough players and its owner
+    gives the message a ▶️.
+
+    Attributes
+    ----------
+    owner : `discord.Member`
+        Member who started the game.
+    players : `list`
+        The game's players, updated in place.
+    minplayers : `int`
+        Players needed before the owner can start early.
+    maxplayers : `int`
+        Players needed to start straight away.
+    changed : `asyncio.Event`
+        Set whenever somebody joins or leaves.
+    ready : `asyncio.Event`
+        Set once the game can start.
+    """
+    JOIN = "👍"
+    START = "▶️"
+
+    def __init__(self, owner, players: list, minplayers: int, maxplayers: int):
+        self.owner = owner
+        self.players = players
+        self.minplayers = minplayers
+        self.maxplayers = maxplayers
+        self.changed = asyncio.Event()
+        self.ready = asyncio.Event()
+
+    def react(self, payload, added: bool):
+        """
+        Add or remove a player, or start the game.
+        """
+        emoji = str(payload.emoji)
+        if emoji == self.START:
+            if added and payload.user_id == self.owner.id \
+                    and len(self.players) >= self.minplayers:
+                self.ready.set()
+            return
+        if emoji != self.JOIN:
+            return
+        player = next((player for player in self.players
+                       if player.id == payload.user_id), None)
+        if added:
+            member = payload.member
+            if player is not None or member is None or member.bot \
+                    or len(self.players) >= self.maxplayers:
+                return
+            self.players.append(member)
+        else:
+            if player is None or player.id == self.owner.id:
+                return
+            self.players.remove(player)
+        self.changed.set()
+        if len(self.players) >= self.maxplayers:
+            self.ready.set()
+
+
+class CobblersReactionRouter:
+    """
+    Routes raw reaction events to whatever is watching that message.
+
+    The cog's `on_raw_reaction_add` and `on_raw_reaction_remove`
+    listeners hand every event to `dispatch`, which finds the watcher
+    with a dict lookup on the message id. Watchers have a
+    ``react(payload, added)`` method.
+    """
+    def __init__(self):
+        self._watching = {}
+
+    def __len__(self):
+        return len(self._watching)
+
+    def watch(self, message_id: int, watcher):
+        """
+        Start passing a message's reactions on to `watcher`.
+        """
+        self._watching[message_id] = watcher
+
+    def discard(self, message_id: int):
+        """
+        Stop watching a message's reactions.
+        """
+        self._watching.pop(message_id, None)
+
+    def dispatch(self, payload, added: bool) -> bool:
+        """
+        Hand a reaction event to the watcher of its message.
+
+        Returns
+        -------
+        `bool`
+            True if somebody was watching the message.
+        """
+        watcher = self._watching.get(payload.message_id)
+        if watcher is None:
+            return False
+        watcher.react(payload, added)
+        return True
+
+
+class CobblersAnswerRouter:
+    """
+    Routes private messages to the round waiting for that author's answer.
+
+    The cog has a single `on_message` listener which hands every
+    message to `dispatch`. Messages sent in a server are dropped
+    straight away and a dict lookup on the author's id finds the round
+    waiting for a private one, so the cost per message stays flat
+    however many players are answering.
+    """
+    def __init__(self):
+        self._waiting = {}
+
+    def __len__(self):
+        return len(self._waiting)
+
+    def expect(self, players) -> CobblersAnswers:
+        """
+        Start collecting answers from the players of a round.
+        """
+        answers = CobblersAnswers(players)
+        for player_id in answers.players:
+            self._waiting[player_id] = answers
+        return answers
+
+    def discard(self, answers: CobblersAnswers):
+        """
+        Stop collecting answers for a round.
+        """
+        for player_id in answers.players:
+            if self._waiting.get(player_id) is answers:
+                del self._waiting[player_id]
+
+    def dispatch(self, message) -> bool:
+        """
+        Hand a private message to the round waiting for it.
+
+        Returns
+        -------
+        `bool`
+            True if the message was taken as an answer.
+        """
+        if message.guild is not None:
+            return False
+        answers = self._waiting.get(message.author.id)
+        if answers is None:
+            return False
+        answers.submit(message.author, message.content)
+        return True